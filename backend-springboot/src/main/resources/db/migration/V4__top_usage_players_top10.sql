@@ -0,0 +1,12 @@
+-- Room for a configurable top-N (up to 10) per team; the API still reads player1..5
+ALTER TABLE top_usage_players
+  ADD COLUMN IF NOT EXISTS player6_name TEXT,
+  ADD COLUMN IF NOT EXISTS player6_usage DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS player7_name TEXT,
+  ADD COLUMN IF NOT EXISTS player7_usage DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS player8_name TEXT,
+  ADD COLUMN IF NOT EXISTS player8_usage DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS player9_name TEXT,
+  ADD COLUMN IF NOT EXISTS player9_usage DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS player10_name TEXT,
+  ADD COLUMN IF NOT EXISTS player10_usage DOUBLE PRECISION;
@@ -2,11 +2,20 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
 from datetime import date, datetime, timedelta
 
+from arrbo_ingest.browser_pool import close_browser_pools
 from arrbo_ingest.config import get_current_nba_season
+from arrbo_ingest.db import close_pool, init_pool_from_env
 from arrbo_ingest.logging_config import setup_logging
+from arrbo_ingest import replay
+from arrbo_ingest.ratelimit import NBA_STATS_HOST
+from arrbo_ingest.resilience import log_summary
+from arrbo_ingest.response_cache import cache_from_env
 from arrbo_ingest.jobs import usage, positions, averages, defensive_efficiency, games
+from arrbo_ingest.scheduler import Job, run_dag
+from arrbo_ingest.transport import install_transport, log_transport_summary, uninstall_transport
 
 log = logging.getLogger(__name__)
 
@@ -16,13 +25,64 @@ def _parse_yyyy_mm_dd(s: str) -> date:
     return datetime.strptime(s, "%Y-%m-%d").date()
 
 
-def add_common_args(p: argparse.ArgumentParser, *, include_headless: bool = False, include_games_days: bool = False) -> None:
+def add_common_args(
+    p: argparse.ArgumentParser,
+    *,
+    include_headless: bool = False,
+    include_games_days: bool = False,
+    include_write_mode: bool = False,
+    include_usage_top_n: bool = False,
+) -> None:
     p.add_argument("--db", default="arrbo.db", help="DB identifier/path (env-driven for Postgres)")
     p.add_argument("--season", default=None, help="Season like 2025-26 (default: auto)")
     p.add_argument("--log-level", default="INFO", help="DEBUG/INFO/WARNING/ERROR")
+    p.add_argument(
+        "--cache-dir",
+        default=None,
+        help="On-disk stats.nba.com response cache (default: ARRBO_HTTP_CACHE_DIR, unset = no cache)",
+    )
+    p.add_argument("--no-cache", action="store_true", help="Disable the response cache even if configured")
+
+    upstream = p.add_mutually_exclusive_group()
+    upstream.add_argument("--record", metavar="DIR", default=None, help="Save every upstream response to DIR")
+    upstream.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Serve upstream responses recorded with --record from a local stand-in instead of the network",
+    )
+    p.add_argument(
+        "--replay-latency-ms",
+        default=None,
+        help="Delay injected per stand-in response, e.g. 50 or 20-80 (uniform range)",
+    )
 
     if include_headless:
         p.add_argument("--headless", action="store_true", help="Run browser headless")
+        p.add_argument(
+            "--engine",
+            choices=defensive_efficiency.ENGINES,
+            default="auto",
+            help="def-eff scraper: http = fetch + parse, selenium = browser, auto = http with selenium fallback",
+        )
+
+    if include_write_mode:
+        p.add_argument(
+            "--write-mode",
+            choices=["diff", "merge"],
+            default="diff",
+            help="diff = write only changed players (default), merge = restage the whole snapshot",
+        )
+
+    if include_usage_top_n:
+        p.add_argument(
+            "--usage-top-n",
+            type=int,
+            choices=range(1, usage.MAX_TOP_N + 1),
+            default=usage.DEFAULT_TOP_N,
+            metavar=f"{{1..{usage.MAX_TOP_N}}}",
+            help=f"How many top usage players to store per team (default: {usage.DEFAULT_TOP_N})",
+        )
 
     if include_games_days:
         p.add_argument(
@@ -41,61 +101,129 @@ def main() -> int:
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     p_usage = sub.add_parser("usage", help="Ingest top usage players")
-    add_common_args(p_usage)
+    add_common_args(p_usage, include_usage_top_n=True)
 
     p_positions = sub.add_parser("positions", help="Ingest player positions")
-    add_common_args(p_positions)
+    add_common_args(p_positions, include_write_mode=True)
 
     p_averages = sub.add_parser("averages", help="Ingest per-game averages")
-    add_common_args(p_averages)
+    add_common_args(p_averages, include_write_mode=True)
 
     p_defeff = sub.add_parser("def-eff", help="Scrape defensive efficiency")
     add_common_args(p_defeff, include_headless=True)
 
     #games for a specific date
-    p_games = sub.add_parser("games", help="Ingest games for a given date (NBA scoreboard)")
+    p_games = sub.add_parser("games", help="Ingest games for a given date or date range (NBA scoreboard)")
     add_common_args(p_games)
     p_games.add_argument(
         "--date",
         default=None,
         help="Game date in YYYY-MM-DD (default: today)",
     )
+    p_games.add_argument(
+        "--from",
+        dest="from_date",
+        default=None,
+        help="Range start in YYYY-MM-DD (inclusive); fetched concurrently, written in one transaction",
+    )
+    p_games.add_argument(
+        "--to",
+        dest="to_date",
+        default=None,
+        help="Range end in YYYY-MM-DD (inclusive, default: --from)",
+    )
 
     p_all = sub.add_parser("all", help="Run all ingestion jobs")
-    add_common_args(p_all, include_headless=True, include_games_days=True)
+    add_common_args(
+        p_all,
+        include_headless=True,
+        include_games_days=True,
+        include_write_mode=True,
+        include_usage_top_n=True,
+    )
+    p_all.add_argument(
+        "--max-parallel",
+        type=int,
+        default=4,
+        help="Max number of ingestion jobs running at the same time (1 = serial)",
+    )
 
     args = parser.parse_args()
     setup_logging(args.log_level)
 
     season = args.season or get_current_nba_season()
 
+    # one pooled connection per concurrently running job
+    init_pool_from_env(default_max_size=getattr(args, "max_parallel", 1))
+    base_url = None
+    if args.replay:
+        # no pacing against the stand-in unless asked for: replay runs measure parse + write
+        os.environ.setdefault("ARRBO_HTTP_RPS", "1000")
+        standin = replay.start_replay(args.replay, replay.parse_latency_ms(args.replay_latency_ms))
+        base_url = standin.local_url(f"https://{NBA_STATS_HOST}/stats")
+    recorder = replay.start_recording(args.record) if args.record else None
+
+    # one keep-alive session for every nba_api call in the run
+    install_transport(
+        base_url=base_url,
+        cache=None if args.replay else cache_from_env(args.cache_dir, enabled=not args.no_cache),
+        recorder=recorder,
+    )
+    try:
+        return _run_command(args, season)
+    finally:
+        log_summary()
+        log_transport_summary()
+        uninstall_transport()
+        close_browser_pools()
+        replay.stop()
+        close_pool()
+
+
+def _run_command(args: argparse.Namespace, season: str) -> int:
     if args.cmd == "usage":
-        usage.run(args.db, season)
+        usage.run(args.db, season, top_n=args.usage_top_n)
 
     elif args.cmd == "positions":
-        positions.run(args.db, season)
+        positions.run(args.db, season, write_mode=args.write_mode)
 
     elif args.cmd == "averages":
-        averages.run(args.db, season)
+        averages.run(args.db, season, write_mode=args.write_mode)
 
     elif args.cmd == "def-eff":
-        defensive_efficiency.run(args.db, headless=args.headless)
+        defensive_efficiency.run(args.db, headless=args.headless, engine=args.engine)
 
     elif args.cmd == "games":
-        d = _parse_yyyy_mm_dd(args.date) if args.date else date.today()
-        games.run(d)
+        if args.from_date or args.to_date:
+            if args.date:
+                raise SystemExit("--date cannot be combined with --from/--to")
+            if not args.from_date:
+                raise SystemExit("--to requires --from")
+            start = _parse_yyyy_mm_dd(args.from_date)
+            end = _parse_yyyy_mm_dd(args.to_date) if args.to_date else start
+            games.run_range(start, end)
+        else:
+            d = _parse_yyyy_mm_dd(args.date) if args.date else date.today()
+            games.run(d)
 
     elif args.cmd == "all":
-        usage.run(args.db, season)
-        positions.run(args.db, season)
-        averages.run(args.db, season)
-        defensive_efficiency.run(args.db, headless=True)
-
-        #games for today + next N-1 days (default 2 = today+tomorrow)
+        # The jobs share no data, so they have no deps and each commits in its own connection
+        jobs = [
+            Job("usage", lambda: usage.run(args.db, season, top_n=args.usage_top_n)),
+            Job("positions", lambda: positions.run(args.db, season, write_mode=args.write_mode)),
+            Job("averages", lambda: averages.run(args.db, season, write_mode=args.write_mode)),
+            Job("def-eff", lambda: defensive_efficiency.run(args.db, headless=True, engine=args.engine)),
+        ]
+
+        #games for today + next N-1 days (default 2 = today+tomorrow), as one range job
         days = max(1, int(getattr(args, "games_days", 2)))
         start = date.today()
-        for i in range(days):
-            games.run(start + timedelta(days=i))
+        end = start + timedelta(days=days - 1)
+        jobs.append(Job("games", lambda: games.run_range(start, end)))
+
+        results = run_dag(jobs, max_parallel=args.max_parallel)
+        if not all(r.ok for r in results):
+            return 1
 
     return 0
 
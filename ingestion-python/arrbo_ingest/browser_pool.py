@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+log = logging.getLogger(__name__)
+
+
+class _Slot:
+    __slots__ = ("driver", "uses")
+
+    def __init__(self, driver: WebDriver) -> None:
+        self.driver = driver
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Up to `size` warm browsers built by `factory`. checkout() hands one out on a
+    fresh tab and scrubs it on return (cookies and the visited origin's storage
+    cleared, other tabs closed). A browser is quit and replaced after `max_uses`
+    checkouts, or right away if scrubbing it fails.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        *,
+        size: int = 1,
+        max_uses: int = 20,
+        prelaunch: bool = True,
+    ) -> None:
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self._idle: queue.LifoQueue[_Slot] = queue.LifoQueue()
+        self._launched = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launches = 0
+        self.checkouts = 0
+
+        if prelaunch:
+            self._prelaunch()
+
+    def _launch(self) -> _Slot:
+        slot = _Slot(self.factory())
+        with self._lock:
+            self.launches += 1
+        return slot
+
+    def _prelaunch(self) -> None:
+        with self._lock:
+            missing = self.size - self._launched
+            self._launched += missing
+        if missing <= 0:
+            return
+        # Chrome startup is the slow part; start them side by side
+        with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="browser") as ex:
+            futures = [ex.submit(self._launch) for _ in range(missing)]
+        for fut in futures:
+            try:
+                self._idle.put(fut.result())
+            except Exception as e:
+                with self._lock:
+                    self._launched -= 1
+                log.warning("Browser prelaunch failed: %s", e)
+
+    def _acquire(self) -> _Slot:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_launch = self._launched < self.size
+                if can_launch:
+                    self._launched += 1
+            if can_launch:
+                try:
+                    return self._launch()
+                except BaseException:
+                    with self._lock:
+                        self._launched -= 1
+                    raise
+            # all browsers busy; re-check now and then in case one is discarded instead of returned
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _discard(self, slot: _Slot) -> None:
+        with self._lock:
+            self._launched -= 1
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+
+    def _release(self, slot: _Slot) -> None:
+        if self._closed or slot.uses >= self.max_uses:
+            if not self._closed:
+                log.debug("Recycling browser after %d uses", slot.uses)
+            self._discard(slot)
+            return
+        try:
+            scrub(slot.driver)
+        except Exception as e:
+            log.warning("Dropping browser that could not be reset: %s", e)
+            self._discard(slot)
+            return
+        self._idle.put(slot)
+
+    @contextmanager
+    def checkout(self) -> Iterator[WebDriver]:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        slot = self._acquire()
+        slot.uses += 1
+        with self._lock:
+            self.checkouts += 1
+        try:
+            yield slot.driver
+        finally:
+            self._release(slot)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(slot)
+        log.info("Browser pool closed: %d checkouts served by %d launches", self.checkouts, self.launches)
+
+
+def scrub(driver: WebDriver) -> None:
+    """Leave the browser as a new session would find it: no cookies, no site storage, one blank tab."""
+    origin = driver.execute_script("return window.location.origin")
+    if origin and origin != "null":
+        try:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        except Exception:
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except Exception:
+        driver.delete_all_cookies()
+
+    old_handles = driver.window_handles
+    driver.switch_to.new_window("tab")
+    fresh = driver.current_window_handle
+    for handle in old_handles:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(fresh)
+
+
+_pools: dict[str, BrowserPool] = {}
+_pools_guard = threading.Lock()
+
+
+def get_browser_pool(key: str, factory: Callable[[], WebDriver]) -> BrowserPool:
+    """
+    Process-wide pool per key (e.g. one per browser configuration), sized from
+    ARRBO_BROWSER_POOL_SIZE (default 1) and ARRBO_BROWSER_MAX_USES (default 20).
+    """
+    with _pools_guard:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = BrowserPool(
+                factory,
+                size=int(os.getenv("ARRBO_BROWSER_POOL_SIZE", "1")),
+                max_uses=int(os.getenv("ARRBO_BROWSER_MAX_USES", "20")),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_browser_pools() -> None:
+    with _pools_guard:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
 import os
+import threading
 from contextlib import contextmanager
-from typing import Iterator
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Sequence
 
 import psycopg
+from psycopg import sql
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # optional: only needed when ARRBO_DB_POOL is enabled
+    ConnectionPool = None
+
+log = logging.getLogger(__name__)
+
+_pool: "ConnectionPool | None" = None
+_pool_guard = threading.Lock()
 
 
 def _build_dsn() -> str:
@@ -21,8 +37,80 @@ def _build_dsn() -> str:
     return f"postgresql://{user}:{password}@{host}:{port}/{db}"
 
 
+def _configure(conn: psycopg.Connection) -> None:
+    # runs once per pooled connection instead of once per checkout
+    conn.execute("SET TIME ZONE 'UTC';")
+    conn.commit()
+
+
+def init_pool(min_size: int = 1, max_size: int = 4, timeout: float = 30.0) -> "ConnectionPool":
+    """
+    Open the process-wide connection pool (same DSN env vars as connect()).
+    Once open, connect() checks connections out of it instead of dialing Postgres.
+    """
+    global _pool
+    if ConnectionPool is None:
+        raise RuntimeError("Connection pooling needs psycopg_pool (pip install 'psycopg[pool]')")
+
+    with _pool_guard:
+        if _pool is None:
+            _pool = ConnectionPool(
+                _build_dsn(),
+                min_size=min_size,
+                max_size=max(min_size, max_size),
+                timeout=timeout,
+                configure=_configure,
+                check=ConnectionPool.check_connection,
+                name="arrbo_ingest",
+                open=True,
+            )
+            _pool.wait(timeout=timeout)
+            log.info("DB pool open (min=%d max=%d)", min_size, max(min_size, max_size))
+        return _pool
+
+
+def init_pool_from_env(default_max_size: int = 4) -> "ConnectionPool | None":
+    """Enable the pool when ARRBO_DB_POOL is truthy; sizes from ARRBO_DB_POOL_MIN / ARRBO_DB_POOL_MAX."""
+    if os.getenv("ARRBO_DB_POOL", "").strip().lower() not in ("1", "true", "yes", "y"):
+        return None
+    return init_pool(
+        min_size=int(os.getenv("ARRBO_DB_POOL_MIN", "1")),
+        max_size=int(os.getenv("ARRBO_DB_POOL_MAX", str(default_max_size))),
+    )
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_guard:
+        if _pool is not None:
+            log.info("DB pool stats at close: %s", pool_stats())
+            _pool.close()
+            _pool = None
+
+
+def pool_stats() -> dict[str, int]:
+    return _pool.get_stats() if _pool is not None else {}
+
+
+def check_health() -> bool:
+    """Round-trip a trivial query through the pool (or a fresh connection)."""
+    try:
+        with connect() as conn:
+            conn.execute("SELECT 1").fetchone()
+        return True
+    except Exception as e:
+        log.warning("DB health check failed: %s", e)
+        return False
+
+
 @contextmanager
 def connect(_: str | None = None) -> Iterator[psycopg.Connection]:
+    if _pool is not None:
+        # pool.connection() commits on success, rolls back on error, then returns the conn
+        with _pool.connection() as conn:
+            yield conn
+        return
+
     dsn = _build_dsn()
     conn = psycopg.connect(dsn)
     try:
@@ -35,3 +123,221 @@ def connect(_: str | None = None) -> Iterator[psycopg.Connection]:
         raise
     finally:
         conn.close()
+
+
+def table_columns(cur: psycopg.Cursor, table: str) -> set[str]:
+    """Column names of `table` in the current schema (empty if it does not exist)."""
+    cur.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = %s",
+        (table,),
+    )
+    return {name for (name,) in cur.fetchall()}
+
+
+def copy_rows(cur: psycopg.Cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Stream rows into table with COPY FROM STDIN (one round-trip for the whole batch)."""
+    stmt = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    )
+    n = 0
+    with cur.copy(stmt) as copy:
+        for row in rows:
+            copy.write_row(row)
+            n += 1
+    return n
+
+
+def _create_staging(cur: psycopg.Cursor, table: str, columns: Sequence[str]) -> str:
+    """
+    Temp table with just `columns` of `table` (types only: no defaults, so a
+    SERIAL id never burns sequence values while staging). Dropped at commit.
+    """
+    staging = f"_stage_{table}"
+    cur.execute(
+        sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+            sql.Identifier(staging),
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+            sql.Identifier(table),
+        )
+    )
+    return staging
+
+
+def _dedupe_on_key(columns: Sequence[str], rows: Iterable[Sequence[Any]], key: Sequence[str]) -> list[Sequence[Any]]:
+    """Last row wins per key: one statement may not touch the same row twice."""
+    key_idx = [columns.index(k) for k in key]
+    deduped: dict[tuple, Sequence[Any]] = {}
+    for row in rows:
+        deduped[tuple(row[i] for i in key_idx)] = row
+    return list(deduped.values())
+
+
+def copy_upsert(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    key: Sequence[str],
+) -> int:
+    """
+    Bulk upsert: COPY rows into a temp staging table shaped like `table`, then
+    merge with a single INSERT ... ON CONFLICT (key) DO UPDATE.
+    Rows are de-duplicated on `key` (last one wins), as the per-row upserts it
+    replaces tolerated repeats. Returns the number of rows merged.
+    """
+    staging = _create_staging(cur, table, columns)
+    copy_rows(cur, staging, columns, _dedupe_on_key(columns, rows, key))
+
+    cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+    updates = [c for c in columns if c not in key]
+    if updates:
+        on_conflict = sql.SQL("DO UPDATE SET {}").format(
+            sql.SQL(", ").join(
+                sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in updates
+            )
+        )
+    else:
+        on_conflict = sql.SQL("DO NOTHING")
+
+    cur.execute(
+        sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}").format(
+            sql.Identifier(table), cols, cols, sql.Identifier(staging),
+            sql.SQL(", ").join(map(sql.Identifier, key)), on_conflict,
+        )
+    )
+    merged = cur.rowcount
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging)))
+    return merged
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    inserted: int
+    updated: int
+    deleted: int
+
+    def __str__(self) -> str:
+        return f"+{self.inserted} ~{self.updated} -{self.deleted}"
+
+
+def refresh_table(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    key: Sequence[str],
+) -> RefreshStats:
+    """
+    Replace the contents of a snapshot table without TRUNCATE.
+
+    Rows are COPYed into a temp shadow table, then merged into the live table in
+    the caller's transaction: delete rows whose key vanished, update rows whose
+    values changed, insert new keys. Only row locks are taken, so API readers are
+    never blocked and keep seeing the previous snapshot until commit.
+    Rows are de-duplicated on `key` (last one wins).
+    """
+    staging = _create_staging(cur, table, columns)
+    copy_rows(cur, staging, columns, _dedupe_on_key(columns, rows, key))
+
+    t, s = sql.Identifier(table), sql.Identifier(staging)
+    key_match = sql.SQL(" AND ").join(
+        sql.SQL("t.{} = s.{}").format(sql.Identifier(k), sql.Identifier(k)) for k in key
+    )
+    values = [c for c in columns if c not in key]
+    cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    cur.execute(
+        sql.SQL("DELETE FROM {} t WHERE NOT EXISTS (SELECT 1 FROM {} s WHERE {})").format(t, s, key_match)
+    )
+    deleted = cur.rowcount
+
+    updated = 0
+    if values:
+        cur.execute(
+            sql.SQL("UPDATE {} t SET {} FROM {} s WHERE {} AND ({}) IS DISTINCT FROM ({})").format(
+                t,
+                sql.SQL(", ").join(sql.SQL("{} = s.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in values),
+                s,
+                key_match,
+                sql.SQL(", ").join(sql.SQL("t.{}").format(sql.Identifier(c)) for c in values),
+                sql.SQL(", ").join(sql.SQL("s.{}").format(sql.Identifier(c)) for c in values),
+            )
+        )
+        updated = cur.rowcount
+
+    cur.execute(
+        sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} s WHERE NOT EXISTS (SELECT 1 FROM {} t WHERE {})").format(
+            t, cols, sql.SQL(", ").join(sql.SQL("s.{}").format(sql.Identifier(c)) for c in columns),
+            s, t, key_match,
+        )
+    )
+    inserted = cur.rowcount
+
+    cur.execute(sql.SQL("DROP TABLE {}").format(s))
+    return RefreshStats(inserted, updated, deleted)
+
+
+def _row_hash(values: Sequence[Any]) -> str:
+    # .item() unwraps numpy scalars so 5 and np.int64(5) hash the same
+    plain = [v.item() if hasattr(v, "item") else v for v in values]
+    return hashlib.blake2b(json.dumps(plain, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def apply_diff(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    key: str,
+) -> RefreshStats:
+    """
+    Incremental refresh: hash every fetched row and every live row per `key`,
+    then send only the delta (COPY new keys, staged UPDATE for changed rows,
+    DELETE for vanished keys). Unchanged rows cost nothing on the wire or in WAL.
+    Rows are de-duplicated on `key` (last one wins).
+    """
+    key_i = columns.index(key)
+    fetched: dict[Any, Sequence[Any]] = {}
+    for row in rows:
+        fetched[row[key_i]] = row
+
+    t = sql.Identifier(table)
+    cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    # Block other writers (not readers) so the diff stays valid until commit
+    cur.execute(sql.SQL("LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE").format(t))
+    cur.execute(sql.SQL("SELECT {} FROM {}").format(cols, t))
+    live = {r[key_i]: _row_hash(r) for r in cur.fetchall()}
+
+    new_rows = [r for k, r in fetched.items() if k not in live]
+    changed_rows = [r for k, r in fetched.items() if k in live and live[k] != _row_hash(r)]
+    gone_keys = [k for k in live if k not in fetched]
+
+    k = sql.Identifier(key)
+    deleted = 0
+    if gone_keys:
+        cur.execute(sql.SQL("DELETE FROM {} WHERE {} = ANY(%s)").format(t, k), (gone_keys,))
+        deleted = cur.rowcount
+
+    updated = 0
+    values = [c for c in columns if c != key]
+    if changed_rows and values:
+        staging = _create_staging(cur, table, columns)
+        copy_rows(cur, staging, columns, changed_rows)
+        cur.execute(
+            sql.SQL("UPDATE {} t SET {} FROM {} s WHERE t.{} = s.{}").format(
+                t,
+                sql.SQL(", ").join(sql.SQL("{} = s.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in values),
+                sql.Identifier(staging),
+                k, k,
+            )
+        )
+        updated = cur.rowcount
+        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging)))
+
+    inserted = copy_rows(cur, table, columns, new_rows) if new_rows else 0
+    return RefreshStats(inserted, updated, deleted)
@@ -1,84 +1,58 @@
 from __future__ import annotations
 
 import logging
-import random
-import time
-from typing import Callable, TypeVar
 
+import pandas as pd
 from nba_api.stats.endpoints import leaguedashplayerstats
 
-from arrbo_ingest.db import connect
+from arrbo_ingest.db import apply_diff, connect, refresh_table
+from arrbo_ingest.ratelimit import get_limiter
+from arrbo_ingest.resilience import call_with_retries
+from arrbo_ingest.transform import clean_str, column, to_float, to_rows
 
 log = logging.getLogger(__name__)
-T = TypeVar("T")
 
+AVERAGES_COLUMNS = ["player_name", "player_pts", "player_reb", "player_ast", "player_pra"]
 
-def _sleep_polite(base: float = 0.35, jitter: float = 0.35) -> None:
-    time.sleep(base + random.random() * jitter)
 
-
-def _with_retries(fn: Callable[[], T], *, attempts: int = 3, base_sleep: float = 1.0) -> T:
-    last_exc: Exception | None = None
-    for i in range(attempts):
-        try:
-            return fn()
-        except Exception as e:
-            last_exc = e
-            if i == attempts - 1:
-                raise
-            sleep_for = base_sleep * (2 ** i) + random.random() * 0.35
-            log.warning(
-                "Request failed (attempt %d/%d): %s | sleeping %.2fs",
-                i + 1, attempts, e, sleep_for
-            )
-            time.sleep(sleep_for)
-    raise last_exc or RuntimeError("Unknown retry failure")
-
-
-def run(db_path: str, season: str) -> None:
-    log.info("Running averages ingestion for season=%s db=%s", season, db_path)
+def run(db_path: str, season: str, write_mode: str = "diff") -> None:
+    log.info("Running averages ingestion for season=%s db=%s write_mode=%s", season, db_path, write_mode)
 
     log.info("Fetching LeagueDashPlayerStats (PerGame/Base)")
 
     def fetch_stats():
-        _sleep_polite()
-        return leaguedashplayerstats.LeagueDashPlayerStats(
-            season=season,
-            per_mode_detailed="PerGame",
-            measure_type_detailed_defense="Base",
-            timeout=90,
-        ).get_data_frames()[0]
-
-    stats = _with_retries(fetch_stats, attempts=3, base_sleep=1.0)
-
-    player_data: list[tuple[str, float, float, float, float]] = []
-    for _, row in stats.iterrows():
-        try:
-            player_name = str(row["PLAYER_NAME"]).strip()
-            pts = float(row["PTS"])
-            reb = float(row["REB"])
-            ast = float(row["AST"])
-            pra = pts + reb + ast
-            if player_name:
-                player_data.append((player_name, pts, reb, ast, pra))
-        except Exception:
-            continue
+        with get_limiter():
+            return leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season,
+                per_mode_detailed="PerGame",
+                measure_type_detailed_defense="Base",
+                timeout=90,
+            ).get_data_frames()[0]
+
+    stats = call_with_retries(fetch_stats, attempts=3, base_sleep=1.0)
+
+    df = pd.DataFrame({
+        "player_name": clean_str(column(stats, "PLAYER_NAME")),
+        "player_pts": to_float(column(stats, "PTS")),
+        "player_reb": to_float(column(stats, "REB")),
+        "player_ast": to_float(column(stats, "AST")),
+    })
+    df["player_pra"] = df["player_pts"] + df["player_reb"] + df["player_ast"]
+
+    # Drop nameless players and any row with a missing/unparseable stat
+    df = df[df["player_name"] != ""].dropna()
+    player_data = to_rows(df, AVERAGES_COLUMNS)
 
     with connect(db_path) as conn:
         cur = conn.cursor()
 
-        # Clears table and resets SERIAL/IDENTITY counter
-        cur.execute("TRUNCATE TABLE averages RESTART IDENTITY;")
-
-        if player_data:
-            cur.executemany(
-                """
-                INSERT INTO averages (player_name, player_pts, player_reb, player_ast, player_pra)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                player_data
-            )
+        if write_mode == "diff":
+            # Only players whose numbers changed since the last run are written
+            stats = apply_diff(cur, "averages", AVERAGES_COLUMNS, player_data, key="player_name")
+        else:
+            # Merge through a shadow table instead of TRUNCATE so readers never see an empty table
+            stats = refresh_table(cur, "averages", AVERAGES_COLUMNS, player_data, key=["player_name"])
 
         conn.commit()
 
-    log.info("Averages ingestion complete: %d rows", len(player_data))
+    log.info("Averages ingestion complete: %d rows (%s)", len(player_data), stats)
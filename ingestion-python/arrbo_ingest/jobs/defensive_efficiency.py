@@ -1,19 +1,24 @@
 from __future__ import annotations
 
 import logging
-import random
-import time
 import os
+import re
 
-
+import requests
+from bs4 import BeautifulSoup, Tag
 from selenium.webdriver.chrome.service import Service
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
-from arrbo_ingest.db import connect
+from arrbo_ingest.browser_pool import get_browser_pool
+from arrbo_ingest.db import connect, refresh_table
+from arrbo_ingest.replay import get_recorder, upstream_url
+from arrbo_ingest.resilience import call_with_retries
+from arrbo_ingest.transport import get_transport
 
 log = logging.getLogger(__name__)
 
@@ -25,6 +30,18 @@ TEAM_ABBR_TO_ID = {
 }
 
 URL = "https://draftedge.com/nba/nba-defense-vs-position/"
+HOST = "draftedge.com"
+
+ENGINES = ("auto", "http", "selenium")
+
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
 
 POSITION_MAPPING = {
     'PG': ['pg_efficiency', 'sg_efficiency'],
@@ -34,9 +51,57 @@ POSITION_MAPPING = {
     'C': ['c_efficiency']
 }
 
+EFFICIENCY_COLUMNS = ["pg_efficiency", "sg_efficiency", "sf_efficiency", "pf_efficiency", "c_efficiency"]
+
+TAB_SWITCH_TIMEOUT_S = 10.0
+
+# Text of the first table's data rows, or null until it has at least one; changes when a tab re-renders it
+_TABLE_SIGNATURE_JS = """
+const table = document.querySelector("table");
+if (!table) return null;
+const rows = table.querySelectorAll("tr");
+if (rows.length < 2) return null;
+return Array.from(rows).slice(1).map(tr => tr.textContent).join("\\n");
+"""
+
+_TAB_ACTIVE_JS = """
+const b = arguments[0];
+return b.getAttribute("aria-selected") === "true" || b.getAttribute("aria-pressed") === "true"
+    || b.classList.contains("active") || b.classList.contains("selected");
+"""
+
+# [data-team, vs-avg text] for every data row of the first table (header skipped)
+_EXTRACT_TABLE_JS = """
+const table = document.querySelector("table");
+if (!table) return [];
+const out = [];
+for (const tr of Array.from(table.querySelectorAll("tr")).slice(1)) {
+  const tds = tr.querySelectorAll("td");
+  if (tds.length < 2) continue;
+  const team = tds[0].querySelector(".team-click");
+  if (!team) continue;
+  out.push([team.getAttribute("data-team") || "", tds[1].innerText]);
+}
+return out;
+"""
+
+
+def _pivot(updates: list[tuple[int, str, float]]) -> list[tuple]:
+    """
+    Fold scraped (team_id, column, value) cells into one complete row per team,
+    ordered like EFFICIENCY_COLUMNS. Later cells win, same as the old per-cell UPDATEs.
+    """
+    by_team: dict[int, dict[str, float]] = {}
+    for team_id, col, value in updates:
+        # Only allow known columns
+        if col not in EFFICIENCY_COLUMNS:
+            continue
+        by_team.setdefault(team_id, {})[col] = value
 
-def _sleep_polite(base: float = 0.20, jitter: float = 0.25) -> None:
-    time.sleep(base + random.random() * jitter)
+    return [
+        (team_id, *(cells.get(col) for col in EFFICIENCY_COLUMNS))
+        for team_id, cells in sorted(by_team.items())
+    ]
 
 
 def _build_driver(headless: bool) -> webdriver.Chrome:
@@ -65,101 +130,216 @@ def _build_driver(headless: bool) -> webdriver.Chrome:
 
 
 
-def run(db_path: str, headless: bool = True) -> None:
-    log.info("Running defensive efficiency scrape db=%s headless=%s", db_path, headless)
+class ParseError(RuntimeError):
+    """The fetched page does not have the per-position tables the HTTP engine expects."""
 
-    driver = _build_driver(headless)
-    wait = WebDriverWait(driver, 20)
 
+def _parse_value(text: str | None) -> float | None:
     try:
-        driver.get(URL)
+        return float((text or "").strip())
+    except ValueError:
+        return None
+
+
+def _attr_positions(node: Tag) -> set[str]:
+    """Position tokens in a node's id/class/data-* attribute values ("tab-pg", data-pos="C")."""
+    found = set()
+    for attr, value in node.attrs.items():
+        if attr not in ("id", "class") and not attr.startswith("data-"):
+            continue
+        for v in value if isinstance(value, list) else [str(value)]:
+            for token in re.split(r"[^A-Za-z]+", v):
+                if token.upper() in POSITION_MAPPING:
+                    found.add(token.upper())
+    return found
+
+
+def _table_positions(table: Tag) -> set[str]:
+    """
+    Every position a table could belong to: tokens in the id/class/data-* attributes
+    of the table and its close ancestors, else its caption, else the nearest
+    heading/button just before it. More than one means the page is ambiguous.
+    """
+    found: set[str] = set()
+    node: Tag | None = table
+    for _ in range(4):
+        if node is None or not isinstance(node, Tag):
+            break
+        found |= _attr_positions(node)
+        node = node.parent
+    if found:
+        return found
+
+    caption = table.find("caption")
+    label = caption.get_text(" ", strip=True) if caption else ""
+    if not label:
+        prev = table.find_previous(["h1", "h2", "h3", "h4", "h5", "button", "a"])
+        label = prev.get_text(" ", strip=True) if prev else ""
+    token = label.strip().upper()
+    return {token} if token in POSITION_MAPPING else set()
+
+
+def _table_cells(table: Tag) -> list[tuple[int, float]]:
+    """(team_id, vs_avg) for every data row: same cells the Selenium engine reads."""
+    out = []
+    for row in table.find_all("tr"):
+        cols = row.find_all("td")
+        if len(cols) < 2:
+            continue
+        team_el = cols[0].find(class_="team-click")
+        team_abbr = (team_el.get("data-team") if team_el else "") or ""
+        team_id = TEAM_ABBR_TO_ID.get(team_abbr.strip())
+        vs_avg = _parse_value(cols[1].get_text())
+        if team_id and vs_avg is not None:
+            out.append((team_id, vs_avg))
+    return out
+
+
+def parse_page(html: str) -> list[tuple[int, str, float]]:
+    """
+    (team_id, column_name, value) cells for every position, read straight from the
+    server-rendered HTML. Raises ParseError unless every position maps to exactly
+    one data table and every data table to at most one position: a swapped
+    label would otherwise write one position's numbers into another's column.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    by_position: dict[str, list[tuple[int, float]]] = {}
+    for i, table in enumerate(soup.find_all("table")):
+        cells = _table_cells(table)
+        if not cells:
+            continue  # layout or empty table
+        positions = _table_positions(table)
+        if len(positions) > 1:
+            raise ParseError(f"Table #{i} matches several positions: {', '.join(sorted(positions))}")
+        if not positions:
+            continue
+        (pos,) = positions
+        if pos in by_position:
+            raise ParseError(f"More than one table resolves to position {pos}")
+        by_position[pos] = cells
+
+    missing = [pos for pos in POSITION_MAPPING if pos not in by_position]
+    if missing:
+        raise ParseError(f"No table found for positions {', '.join(missing)}")
+
+    updates: list[tuple[int, str, float]] = []
+    for web_pos, db_cols in POSITION_MAPPING.items():
+        for team_id, vs_avg in by_position[web_pos]:
+            for col in db_cols:
+                updates.append((team_id, col, vs_avg))
+    return updates
+
+
+def _scrape_http() -> list[tuple[int, str, float]]:
+    session = get_transport() or requests.Session()
+
+    def fetch_page() -> str:
+        response = session.get(upstream_url(URL), headers=HTTP_HEADERS, timeout=30)
+        response.raise_for_status()
+        return response.text
+
+    html = call_with_retries(fetch_page, host=HOST, attempts=3, base_sleep=2.0)
+    return parse_page(html)
+
+
+def _scrape_selenium(headless: bool) -> list[tuple[int, str, float]]:
+    pool = get_browser_pool(f"def-eff-headless={headless}", lambda: _build_driver(headless))
+    with pool.checkout() as driver:
+        return _scrape_tabs(driver)
+
+
+def _scrape_tabs(driver: webdriver.Chrome) -> list[tuple[int, str, float]]:
+    wait = WebDriverWait(driver, 20)
 
+    def load_page():
+        driver.get(upstream_url(URL))
         # Wait for page to have at least one position button visible
         wait.until(EC.presence_of_element_located((By.XPATH, "//button[contains(., 'PG')]")))
-        _sleep_polite(0.4, 0.4)
-
-        # (team_id, column_name, value)
-        updates: list[tuple[int, str, float]] = []
-
-        for web_pos, db_cols in POSITION_MAPPING.items():
-            log.info("Processing position %s -> %s", web_pos, db_cols)
-
-            try:
-                # Click the tab and wait until it becomes active/updates the table
-                tab_button = wait.until(
-                    EC.element_to_be_clickable((By.XPATH, f"//button[contains(., '{web_pos}')]"))
-                )
-                driver.execute_script("arguments[0].click();", tab_button)
-
-                # Wait for the table to be present and populated
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
-                wait.until(lambda d: len(d.find_element(By.TAG_NAME, "table").find_elements(By.TAG_NAME, "tr")) >= 2)
-                _sleep_polite()
-
-                table = driver.find_element(By.TAG_NAME, "table")
-                rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # skip header
-
-                for row in rows:
-                    cols = row.find_elements(By.TAG_NAME, "td")
-                    if len(cols) < 2:
-                        continue
-
-                    # Team abbreviation stored in data-team attr
-                    try:
-                        team_abbr = cols[0].find_element(By.CLASS_NAME, "team-click").get_attribute("data-team")
-                        team_abbr = (team_abbr or "").strip()
-                    except Exception:
-                        continue
-
-                    team_id = TEAM_ABBR_TO_ID.get(team_abbr)
-                    if not team_id:
-                        continue
-
-                    vs_avg_text = (cols[1].text or "").strip()
-                    try:
-                        vs_avg = float(vs_avg_text)
-                    except Exception:
-                        continue
-
-                    for col in db_cols:
-                        updates.append((team_id, col, vs_avg))
-
-            except Exception as e:
-                log.warning("Could not process position %s: %s", web_pos, e)
-
-        with connect(db_path) as conn:
-            cur = conn.cursor()
-
-            cur.execute("TRUNCATE TABLE defensive_efficiency;")
-
-            # ensure each team exists once
-            team_ids = sorted({t for (t, _, _) in updates})
-            if team_ids:
-                cur.executemany(
-                    """
-                    INSERT INTO defensive_efficiency (team_id)
-                    VALUES (%s)
-                    ON CONFLICT (team_id) DO NOTHING
-                    """,
-                    [(tid,) for tid in team_ids]
-                )
-
-            # Only allow updating known columns
-            allowed_cols = {
-                "pg_efficiency", "sg_efficiency", "sf_efficiency",
-                "pf_efficiency", "c_efficiency"
-            }
-
-            for team_id, col, value in updates:
-                if col not in allowed_cols:
-                    continue
-                cur.execute(
-                    f"UPDATE defensive_efficiency SET {col} = %s WHERE team_id = %s",
-                    (value, team_id)
-                )
-            conn.commit()
 
-        log.info("Defensive efficiency scrape complete. Updated %d cells.", len(updates))
-
-    finally:
-        driver.quit()
+        recorder = get_recorder()
+        if recorder is not None:
+            # the rendered DOM, which is what the tab loop below reads
+            recorder.save(URL, 200, "text/html; charset=utf-8", driver.page_source)
+
+    # TimeoutException is a WebDriverException; a slow/failed page load is worth a retry
+    call_with_retries(load_page, host=HOST, attempts=3, base_sleep=2.0, retry_on=(WebDriverException,))
+
+    # (team_id, column_name, value)
+    updates: list[tuple[int, str, float]] = []
+
+    for web_pos, db_cols in POSITION_MAPPING.items():
+        log.info("Processing position %s -> %s", web_pos, db_cols)
+
+        try:
+            tab_button = wait.until(
+                EC.element_to_be_clickable((By.XPATH, f"//button[contains(., '{web_pos}')]"))
+            )
+            before = driver.execute_script(_TABLE_SIGNATURE_JS)
+            already_active = driver.execute_script(_TAB_ACTIVE_JS, tab_button)
+            driver.execute_script("arguments[0].click();", tab_button)
+
+            # Wait for the table to be re-rendered rather than sleeping; the tab
+            # that is already showing (usually the default one) will not change
+            if before is None or not already_active:
+                try:
+                    WebDriverWait(driver, TAB_SWITCH_TIMEOUT_S, poll_frequency=0.05).until(
+                        lambda d: (sig := d.execute_script(_TABLE_SIGNATURE_JS)) is not None and sig != before
+                    )
+                except TimeoutException:
+                    if before is None:
+                        raise
+                    log.info("Table did not change after clicking %s; reading it as is", web_pos)
+
+            # Whole table in one round-trip: [[data-team, vs-avg text], ...]
+            for team_abbr, vs_avg_text in driver.execute_script(_EXTRACT_TABLE_JS) or []:
+                team_id = TEAM_ABBR_TO_ID.get((team_abbr or "").strip())
+                if not team_id:
+                    continue
+                vs_avg = _parse_value(vs_avg_text)
+                if vs_avg is None:
+                    continue
+                for col in db_cols:
+                    updates.append((team_id, col, vs_avg))
+
+        except Exception as e:
+            log.warning("Could not process position %s: %s", web_pos, e)
+
+    return updates
+
+
+def run(db_path: str, headless: bool = True, engine: str = "auto") -> None:
+    """
+    engine: "http" fetches the page once and parses every position table with
+    BeautifulSoup; "selenium" drives a browser through the tabs; "auto" tries
+    http and falls back to selenium if the fetch or the parse fails.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    log.info("Running defensive efficiency scrape db=%s engine=%s headless=%s", db_path, engine, headless)
+
+    if engine == "selenium":
+        updates = _scrape_selenium(headless)
+    else:
+        try:
+            updates = _scrape_http()
+        except Exception as e:
+            if engine == "http":
+                raise
+            log.warning("HTTP engine failed (%s); falling back to Selenium", e)
+            updates = _scrape_selenium(headless)
+
+    team_rows = _pivot(updates)
+
+    with connect(db_path) as conn:
+        cur = conn.cursor()
+
+        # Full rows merged through a shadow table, no TRUNCATE: readers never see half-filled or missing rows
+        stats = refresh_table(
+            cur, "defensive_efficiency", ["team_id", *EFFICIENCY_COLUMNS], team_rows, key=["team_id"]
+        )
+        conn.commit()
+
+    log.info(
+        "Defensive efficiency scrape complete. Wrote %d teams from %d cells (%s).",
+        len(team_rows), len(updates), stats,
+    )
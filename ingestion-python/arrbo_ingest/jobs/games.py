@@ -1,120 +1,116 @@
 from __future__ import annotations
 
 import logging
-import math
-from datetime import date, datetime
-from typing import Optional
+from datetime import date, timedelta
 
+import pandas as pd
 from nba_api.stats.endpoints import scoreboardv2
 
-from arrbo_ingest.db import connect
+from arrbo_ingest.db import connect, copy_upsert
+from arrbo_ingest.ratelimit import fetch_many, get_limiter
+from arrbo_ingest.resilience import call_with_retries
+from arrbo_ingest.transform import clean_str, column, to_int, to_rows, to_utc_datetime
 
 log = logging.getLogger(__name__)
 
+GAME_COLUMNS = [
+    "game_id", "game_date", "start_time_utc", "status_text",
+    "home_team_id", "home_team_abbr", "home_team_score",
+    "away_team_id", "away_team_abbr", "away_team_score",
+]
+
 
 def _to_mmddyyyy(d: date) -> str:
     return d.strftime("%m/%d/%Y")
 
 
-def _parse_iso(dt_str: Optional[str]) -> Optional[datetime]:
-    if not dt_str:
-        return None
-    try:
-        return datetime.fromisoformat(str(dt_str).replace("Z", "+00:00"))
-    except Exception:
-        return None
-
+def _fetch_day(game_date: date) -> list[tuple]:
+    log.info("Fetching games for %s", game_date.isoformat())
 
-def _safe_int(val) -> int:
-    """Convert NBA API numeric fields to int, handling None/NaN/empty."""
-    if val is None:
-        return 0
-    try:
-        if isinstance(val, float) and math.isnan(val):
-            return 0
-        return int(float(val))
-    except Exception:
-        return 0
+    def fetch_scoreboard():
+        with get_limiter():
+            return scoreboardv2.ScoreboardV2(
+                game_date=_to_mmddyyyy(game_date),
+                league_id="00",
+                timeout=60,
+            ).get_data_frames()
+
+    frames = call_with_retries(fetch_scoreboard, attempts=3, base_sleep=1.0)
+    game_header = frames[0]
+    line_score = frames[1]
+
+    # (game_id, team_id) -> abbr, score
+    teams = pd.DataFrame({
+        "GAME_ID": clean_str(column(line_score, "GAME_ID")),
+        "TEAM_ID": to_int(column(line_score, "TEAM_ID")),
+        "ABBR": clean_str(column(line_score, "TEAM_ABBREVIATION")),
+        "PTS": to_int(column(line_score, "PTS")),
+    })
+    teams = teams[(teams["GAME_ID"] != "") & (teams["TEAM_ID"] != 0)]
+    teams = teams.drop_duplicates(["GAME_ID", "TEAM_ID"], keep="last")
+
+    games = pd.DataFrame({
+        "game_id": clean_str(column(game_header, "GAME_ID")),
+        "game_date": game_date,
+        "start_time_utc": to_utc_datetime(column(game_header, "GAME_DATE_TIME_UTC")),
+        "status_text": clean_str(column(game_header, "GAME_STATUS_TEXT")),
+        "home_team_id": to_int(column(game_header, "HOME_TEAM_ID")),
+        "away_team_id": to_int(column(game_header, "VISITOR_TEAM_ID")),
+    })
+    games = games[games["game_id"] != ""]
+
+    for side in ("home", "away"):
+        side_teams = teams.rename(columns={
+            "GAME_ID": "game_id",
+            "TEAM_ID": f"{side}_team_id",
+            "ABBR": f"{side}_team_abbr",
+            "PTS": f"{side}_team_score",
+        })
+        games = games.merge(side_teams, on=["game_id", f"{side}_team_id"], how="left")
+        games[f"{side}_team_abbr"] = games[f"{side}_team_abbr"].fillna("")
+        games[f"{side}_team_score"] = games[f"{side}_team_score"].fillna(0).astype("int64")
+
+    return to_rows(games, GAME_COLUMNS)
 
 
 def run(game_date: date) -> None:
-    log.info("Fetching games for %s", game_date.isoformat())
-
-    sb = scoreboardv2.ScoreboardV2(
-        game_date=_to_mmddyyyy(game_date),
-        league_id="00",
-        timeout=60,
+    run_range(game_date, game_date)
+
+
+def run_range(start: date, end: date) -> None:
+    """
+    Ingest every day in [start, end]: scoreboards are fetched concurrently under the
+    shared stats.nba.com limiter, then all rows land in one transaction (one DELETE
+    for the fetched days + one staged COPY merge). Days whose fetch failed are left
+    untouched in the DB and reported by raising after the successful days are written.
+    """
+    if end < start:
+        raise ValueError(f"--to {end.isoformat()} is before --from {start.isoformat()}")
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    by_day, errors = fetch_many(_fetch_day, days)
+    for d, e in errors.items():
+        log.warning("Failed to fetch games for %s: %s", d.isoformat(), e)
+
+    fetched_days = sorted(by_day)
+    # A postponed game is listed under both its old and new date: the later day wins
+    id_idx = GAME_COLUMNS.index("game_id")
+    games = {row[id_idx]: row for d in fetched_days for row in by_day[d]}
+    n_rows = len(games)
+
+    if fetched_days:
+        with connect(None) as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM games WHERE game_date = ANY(%s)", (fetched_days,))
+
+                if n_rows:
+                    copy_upsert(cur, "games", GAME_COLUMNS, games.values(), key=["game_id"])
+
+    log.info(
+        "Upserted %d games for %d/%d days (%s..%s)",
+        n_rows, len(fetched_days), len(days), start.isoformat(), end.isoformat(),
     )
-
-    game_header = sb.get_data_frames()[0]
-    line_score = sb.get_data_frames()[1]
-
-    # Map: (game_id, team_id) -> (abbr, score)
-    team_rows: dict[tuple[str, int], tuple[str, int]] = {}
-    for _, r in line_score.iterrows():
-        gid = str(r.get("GAME_ID") or "")
-        tid = int(r.get("TEAM_ID") or 0)
-        if not gid or not tid:
-            continue
-        team_rows[(gid, tid)] = (
-            str(r.get("TEAM_ABBREVIATION") or ""),
-            _safe_int(r.get("PTS")),
-        )
-
-    rows = []
-    for _, g in game_header.iterrows():
-        game_id = str(g.get("GAME_ID") or "")
-        if not game_id:
-            continue
-
-        home_team_id = int(g.get("HOME_TEAM_ID") or 0)
-        away_team_id = int(g.get("VISITOR_TEAM_ID") or 0)
-        status_text = str(g.get("GAME_STATUS_TEXT") or "")
-        start_time_utc = _parse_iso(g.get("GAME_DATE_TIME_UTC"))
-
-        home_abbr, home_score = team_rows.get((game_id, home_team_id), ("", 0))
-        away_abbr, away_score = team_rows.get((game_id, away_team_id), ("", 0))
-
-        rows.append(
-            (
-                game_id,
-                game_date,
-                start_time_utc,
-                status_text,
-                home_team_id,
-                home_abbr,
-                home_score,
-                away_team_id,
-                away_abbr,
-                away_score,
-            )
+    if errors:
+        raise RuntimeError(
+            "Games fetch failed for " + ", ".join(d.isoformat() for d in sorted(errors))
         )
-
-    with connect(None) as conn:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM games WHERE game_date = %s", (game_date,))
-
-            if rows:
-                cur.executemany(
-                    """
-                    INSERT INTO games (
-                      game_id, game_date, start_time_utc, status_text,
-                      home_team_id, home_team_abbr, home_team_score,
-                      away_team_id, away_team_abbr, away_team_score
-                    )
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON CONFLICT (game_id) DO UPDATE SET
-                      game_date = EXCLUDED.game_date,
-                      start_time_utc = EXCLUDED.start_time_utc,
-                      status_text = EXCLUDED.status_text,
-                      home_team_id = EXCLUDED.home_team_id,
-                      home_team_abbr = EXCLUDED.home_team_abbr,
-                      home_team_score = EXCLUDED.home_team_score,
-                      away_team_id = EXCLUDED.away_team_id,
-                      away_team_abbr = EXCLUDED.away_team_abbr,
-                      away_team_score = EXCLUDED.away_team_score
-                    """,
-                    rows,
-                )
-
-    log.info("Upserted %d games for %s", len(rows), game_date.isoformat())
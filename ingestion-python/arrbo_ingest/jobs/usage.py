@@ -1,138 +1,146 @@
 from __future__ import annotations
 
+import itertools
 import logging
-import random
-import time
-from typing import Callable, TypeVar
 
-from nba_api.stats.endpoints import leaguedashplayerstats, commonteamroster
+import pandas as pd
+from nba_api.stats.endpoints import leaguedashplayerstats
 
 from arrbo_ingest.config import TEAM_ID_MAPPING
-from arrbo_ingest.db import connect
+from arrbo_ingest.db import connect, refresh_table, table_columns
+from arrbo_ingest.ratelimit import get_limiter
+from arrbo_ingest.resilience import call_with_retries
+from arrbo_ingest.rosters import load_rosters
+from arrbo_ingest.transform import clean_str, column, to_float, to_int, to_rows
 
 log = logging.getLogger(__name__)
 
-T = TypeVar("T")
-
-
-def _sleep_polite(base: float = 0.35, jitter: float = 0.35) -> None:
-    time.sleep(base + random.random() * jitter)
-
-
-def _with_retries(fn: Callable[[], T], *, attempts: int = 4, base_sleep: float = 1.0) -> T:
-    last_exc: Exception | None = None
-    for i in range(attempts):
-        try:
-            return fn()
-        except Exception as e:
-            last_exc = e
-            if i == attempts - 1:
-                raise
-            sleep_for = base_sleep * (2 ** i) + random.random() * 0.35
-            log.warning("Request failed (attempt %d/%d): %s | sleeping %.2fs",
-                        i + 1, attempts, e, sleep_for)
-            time.sleep(sleep_for)
-    raise last_exc or RuntimeError("Unknown retry failure")
-
-
-def _get_roster_players(nba_team_id: int, season: str, timeout: int = 60) -> set[str]:
-    def fetch():
-        _sleep_polite()
-        return commonteamroster.CommonTeamRoster(
-            team_id=nba_team_id,
-            season=season,
-            timeout=timeout,
-        ).get_data_frames()[0]
-
-    df = _with_retries(fetch, attempts=4, base_sleep=1.0)
-    # normalize whitespace just in case
-    return {str(name).strip() for name in df["PLAYER"].tolist() if name}
-
-
-
-def run(db_path: str, season: str) -> None:
-    log.info("Running usage ingestion for season=%s db=%s", season, db_path)
+DEFAULT_TOP_N = 5
+# top_usage_players has player1..player10 slots since V4 (player1..5 before); the API reads 1..5
+MAX_TOP_N = 10
+
+USAGE_COLUMNS = [
+    "team_id",
+    *itertools.chain.from_iterable(
+        (f"player{i}_name", f"player{i}_usage") for i in range(1, MAX_TOP_N + 1)
+    ),
+]
+
+
+def _slot_columns(slots: int) -> list[str]:
+    return USAGE_COLUMNS[: 1 + 2 * slots]
+
+
+def _available_slots(cur) -> int:
+    """
+    player slots the live table has. Flyway migrations run when the API starts,
+    so an upgraded ingest container can meet a table that is still pre-V4.
+    """
+    columns = table_columns(cur, "top_usage_players")
+    slots = 0
+    while slots < MAX_TOP_N and f"player{slots + 1}_name" in columns:
+        slots += 1
+    return slots
+
+
+def _roster_table(rosters: dict[int, pd.DataFrame]) -> pd.DataFrame:
+    """All current rosters as one (TEAM_ID, PLAYER_NAME) frame."""
+    frames = [
+        pd.DataFrame({"TEAM_ID": nba_team_id, "PLAYER_NAME": clean_str(column(df, "PLAYER"))})
+        for nba_team_id, df in rosters.items()
+    ]
+    if not frames:
+        return pd.DataFrame({"TEAM_ID": pd.Series(dtype="int64"), "PLAYER_NAME": pd.Series(dtype=object)})
+    table = pd.concat(frames, ignore_index=True)
+    return table[table["PLAYER_NAME"] != ""].drop_duplicates()
+
+
+def _top_n(all_players: pd.DataFrame, roster_table: pd.DataFrame, top_n: int) -> pd.DataFrame:
+    """
+    One wide row per team with its top_n current players by USG_PCT, laid out like
+    USAGE_COLUMNS (slots past top_n are None). Teams with fewer than top_n current
+    players in the usage data are left out, same as before.
+    """
+    league = pd.DataFrame({
+        "TEAM_ID": to_int(column(all_players, "TEAM_ID")),
+        "PLAYER_NAME": clean_str(column(all_players, "PLAYER_NAME")),
+        "USG_PCT": to_float(column(all_players, "USG_PCT")),
+    })
+
+    # Keep only current roster: one join instead of a mask + isin per team
+    ranked = league.merge(roster_table, on=["TEAM_ID", "PLAYER_NAME"], how="inner")
+    # Stable sort, name as tiebreak so equal usage always ranks the same way
+    ranked = ranked.sort_values(
+        ["TEAM_ID", "USG_PCT", "PLAYER_NAME"], ascending=[True, False, True], kind="mergesort"
+    )
+    ranked = ranked.groupby("TEAM_ID", sort=False).head(top_n)
+    ranked["RANK"] = ranked.groupby("TEAM_ID", sort=False).cumcount() + 1
+
+    sizes = ranked.groupby("TEAM_ID")["RANK"].transform("size")
+    ranked = ranked[sizes == top_n]
+
+    wide = ranked.pivot(index="TEAM_ID", columns="RANK", values=["PLAYER_NAME", "USG_PCT"])
+    wide = wide.reindex(
+        columns=pd.MultiIndex.from_product([["PLAYER_NAME", "USG_PCT"], range(1, MAX_TOP_N + 1)])
+    )
+    wide = wide.astype(object).where(wide.notna(), None)
+
+    out = pd.DataFrame({"team_id": wide.index.map(lambda t: TEAM_ID_MAPPING.get(str(t)))}, index=wide.index)
+    for i in range(1, MAX_TOP_N + 1):
+        out[f"player{i}_name"] = wide[("PLAYER_NAME", i)]
+        out[f"player{i}_usage"] = wide[("USG_PCT", i)]
+    return out[out["team_id"].notna()].sort_values("team_id")
+
+
+def run(db_path: str, season: str, top_n: int = DEFAULT_TOP_N) -> None:
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise ValueError(f"top_n must be between 1 and {MAX_TOP_N}, got {top_n}")
+    log.info("Running usage ingestion for season=%s db=%s top_n=%d", season, db_path, top_n)
 
     log.info("Fetching LeagueDashPlayerStats (Usage)")
     def fetch_usage():
-        _sleep_polite()
-        return leaguedashplayerstats.LeagueDashPlayerStats(
-            season=season,
-            per_mode_detailed="PerGame",
-            measure_type_detailed_defense="Usage",
-            timeout=90,
-        ).get_data_frames()[0]
+        with get_limiter():
+            return leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season,
+                per_mode_detailed="PerGame",
+                measure_type_detailed_defense="Usage",
+                timeout=90,
+            ).get_data_frames()[0]
 
     try:
-        all_players = _with_retries(fetch_usage, attempts=3, base_sleep=1.0)
+        all_players = call_with_retries(fetch_usage, attempts=3, base_sleep=1.0)
     except Exception as e:
         log.error("Failed to fetch league usage stats after retries: %s", e)
         raise
 
-    inserts: list[tuple[int, str, float, str, float, str, float, str, float, str, float]] = []
-    failed_teams: list[str] = []
-
-    for nba_team_id_str, db_team_id in TEAM_ID_MAPPING.items():
-        nba_team_id = int(nba_team_id_str)
-        log.info("Processing team nba_team_id=%s db_team_id=%s", nba_team_id, db_team_id)
-
-        try:
-            current_players = _get_roster_players(nba_team_id, season, timeout=60)
-        except Exception as e:
-            log.warning("Failed roster fetch for team %s: %s", nba_team_id, e)
-            failed_teams.append(nba_team_id_str)
-            continue
-
-        team_players = all_players[all_players["TEAM_ID"] == nba_team_id]
-        if team_players.empty:
-            log.warning("No usage rows for team %s", nba_team_id)
-            continue
-
-        # Keep only current roster
-        team_players = team_players[team_players["PLAYER_NAME"].isin(current_players)]
-        if team_players.empty:
-            log.warning("No current players found in usage data for team %s", nba_team_id)
-            continue
-
-        # Sort by usage %
-        team_players = team_players.sort_values("USG_PCT", ascending=False)
-        top5 = team_players.head(5)
-        if len(top5) < 5:
-            log.warning("Not enough usage rows for team %s", nba_team_id)
-            continue
-
-        p1 = top5.iloc[0]
-        p2 = top5.iloc[1]
-        p3 = top5.iloc[2]
-        p4 = top5.iloc[3]
-        p5 = top5.iloc[4]
-        inserts.append(
-            (db_team_id,
-             str(p1["PLAYER_NAME"]), float(p1["USG_PCT"]),
-             str(p2["PLAYER_NAME"]), float(p2["USG_PCT"]),
-             str(p3["PLAYER_NAME"]), float(p3["USG_PCT"]),
-             str(p4["PLAYER_NAME"]), float(p4["USG_PCT"]),
-             str(p5["PLAYER_NAME"]), float(p5["USG_PCT"]))
-        )
+    # One roster pass through the shared cache (positions reuses the same frames)
+    rosters, failed_teams = load_rosters(season, timeout=60)
 
-        _sleep_polite(0.20, 0.25)
+    top = _top_n(all_players, _roster_table(rosters), top_n)
+    short_teams = sorted(set(rosters) - set(top.index))
+    if short_teams:
+        log.warning(
+            "Not enough current players in usage data for %d teams: %s",
+            len(short_teams), ", ".join(str(t) for t in short_teams),
+        )
 
     with connect(db_path) as conn:
         cur = conn.cursor()
 
-        cur.execute("TRUNCATE TABLE top_usage_players;")
-
-        if inserts:
-            cur.executemany(
-                """
-                INSERT INTO top_usage_players
-                (team_id, player1_name, player1_usage, player2_name, player2_usage, player3_name, player3_usage, player4_name, player4_usage, player5_name, player5_usage)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                inserts,
+        slots = _available_slots(cur)
+        if top_n > slots:
+            raise RuntimeError(
+                f"top_usage_players has {slots} player slots, top_n={top_n} needs the V4 migration: "
+                "start the API (Flyway) before running usage with --usage-top-n > 5"
             )
+        # Every slot the table has is written (past top_n as NULL) so lowering top_n clears the old tail
+        columns = _slot_columns(slots)
+        inserts = to_rows(top, columns)
+
+        # Merge through a shadow table instead of TRUNCATE so readers never see an empty table.
+        stats = refresh_table(cur, "top_usage_players", columns, inserts, key=["team_id"])
         conn.commit()
 
-    log.info("Usage ingestion complete. Inserted %d teams.", len(inserts))
+    log.info("Usage ingestion complete. Wrote %d teams (%s).", len(inserts), stats)
     if failed_teams:
-        log.warning("Roster fetch failed for %d teams: %s", len(failed_teams), ", ".join(failed_teams))
\ No newline at end of file
+        log.warning("Roster fetch failed for %d teams: %s", len(failed_teams), ", ".join(failed_teams))
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Iterable, TypeVar
+
+log = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+NBA_STATS_HOST = "stats.nba.com"
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                sleep_for = (1.0 - self._tokens) / self.rate
+            time.sleep(sleep_for)
+            waited += sleep_for
+
+
+class RateLimiter:
+    """
+    Gate for outbound requests to one host: a token bucket for the request rate
+    plus a semaphore capping requests in flight. Use as a context manager around
+    exactly one request.
+    """
+
+    def __init__(self, host: str, rps: float, max_in_flight: int, burst: int = 1) -> None:
+        self.host = host
+        self.bucket = TokenBucket(rps, burst)
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.waited_s = 0.0
+
+    def __enter__(self) -> "RateLimiter":
+        t0 = time.monotonic()
+        self._slots.acquire()
+        try:
+            self.bucket.acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self.requests += 1
+            self.waited_s += time.monotonic() - t0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._slots.release()
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_guard = threading.Lock()
+
+
+def get_limiter(host: str = NBA_STATS_HOST) -> RateLimiter:
+    """
+    Process-wide limiter per host, so every job in a run shares one request budget.
+    Configured from ARRBO_HTTP_RPS / ARRBO_HTTP_MAX_IN_FLIGHT / ARRBO_HTTP_BURST.
+    """
+    with _limiters_guard:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(
+                host,
+                rps=float(os.getenv("ARRBO_HTTP_RPS", "2.0")),
+                max_in_flight=int(os.getenv("ARRBO_HTTP_MAX_IN_FLIGHT", "4")),
+                burst=int(os.getenv("ARRBO_HTTP_BURST", "1")),
+            )
+            _limiters[host] = limiter
+        return limiter
+
+
+def fetch_many(
+    fn: Callable[[K], T],
+    keys: Iterable[K],
+    *,
+    limiter: RateLimiter | None = None,
+) -> tuple[dict[K, T], dict[K, Exception]]:
+    """
+    Run fn(key) for every key on a thread pool sized to the limiter's in-flight cap.
+    fn is responsible for entering the limiter around its request(s); the pool only
+    provides the fan-out. Returns ({key: result}, {key: exception}) in key order.
+    """
+    limiter = limiter or get_limiter()
+    keys = list(keys)
+    results: dict[K, T] = {}
+    errors: dict[K, Exception] = {}
+
+    with ThreadPoolExecutor(max_workers=limiter.max_in_flight, thread_name_prefix="fetch") as ex:
+        futures = {key: ex.submit(fn, key) for key in keys}
+        for key in keys:
+            try:
+                results[key] = futures[key].result()
+            except Exception as e:
+                errors[key] = e
+
+    return results, errors
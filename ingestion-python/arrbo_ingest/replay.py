@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+log = logging.getLogger(__name__)
+
+
+def _exchange_key(host: str, path: str, query: str) -> str:
+    # params sorted so the key does not depend on how the client ordered them
+    canonical = f"{host.lower()}{path}?{urlencode(sorted(parse_qsl(query, keep_blank_values=True)))}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Recorder:
+    """
+    Writes every upstream response of a run into `record_dir`, one JSON file per
+    distinct request under a directory per host. A later --replay run serves them back.
+    """
+
+    def __init__(self, record_dir: str) -> None:
+        self.record_dir = record_dir
+        self.saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(record_dir, exist_ok=True)
+
+    def save(self, url: str, status: int, content_type: str, body: str) -> None:
+        parts = urlsplit(url)
+        host_dir = os.path.join(self.record_dir, parts.netloc.lower())
+        path = os.path.join(host_dir, _exchange_key(parts.netloc, parts.path, parts.query) + ".json")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(host_dir, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "status": status, "content_type": content_type, "body": body}, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("Could not record %s: %s", url, e)
+            return
+        with self._lock:
+            self.saved += 1
+
+
+class StandIn:
+    """
+    Local stand-in for every upstream host, serving what a Recorder captured.
+    Upstream https://host/path?q is served at http://127.0.0.1:port/host/path?q
+    (see local_url), after an injected delay drawn uniformly from latency_ms.
+    Requests with no recording get a 404.
+    """
+
+    def __init__(self, replay_dir: str, latency_ms: tuple[float, float] = (0.0, 0.0), port: int = 0) -> None:
+        if not os.path.isdir(replay_dir):
+            raise FileNotFoundError(f"Replay directory {replay_dir} does not exist")
+        self.replay_dir = replay_dir
+        self.latency_ms = latency_ms
+        self.served = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def local_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{self.base_url}/{parts.netloc.lower()}{parts.path}{query}"
+
+    def _lookup(self, raw_path: str) -> dict | None:
+        parts = urlsplit(raw_path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        file = os.path.join(self.replay_dir, host, _exchange_key(host, "/" + path, parts.query) + ".json")
+        try:
+            with open(file, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _delay(self) -> None:
+        lo, hi = self.latency_ms
+        if hi > 0:
+            time.sleep(random.uniform(lo, hi) / 1000.0)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                standin._delay()
+                exchange = standin._lookup(self.path)
+                with standin._lock:
+                    if exchange is None:
+                        standin.missing += 1
+                    else:
+                        standin.served += 1
+                if exchange is None:
+                    log.warning("No recording for %s", self.path)
+                    status, content_type, body = 404, "text/plain", b"no recording"
+                else:
+                    status = exchange["status"]
+                    content_type = exchange["content_type"]
+                    body = exchange["body"].encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                log.debug("stand-in: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "StandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+        log.info("Replaying %s from stand-in at %s (latency %s ms)", self.replay_dir, self.base_url, self.latency_ms)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        log.info("Stand-in served %d recorded responses, %d missing", self.served, self.missing)
+
+
+def parse_latency_ms(spec: str | None) -> tuple[float, float]:
+    """'50' -> (50, 50), '20-80' -> (20, 80), None/'' -> no delay."""
+    if not spec:
+        return (0.0, 0.0)
+    lo, _, hi = spec.partition("-")
+    lo_f = float(lo)
+    hi_f = float(hi) if hi else lo_f
+    if lo_f < 0 or hi_f < lo_f:
+        raise ValueError(f"Bad latency range {spec!r}")
+    return (lo_f, hi_f)
+
+
+_recorder: Recorder | None = None
+_standin: StandIn | None = None
+
+
+def start_recording(record_dir: str) -> Recorder:
+    global _recorder
+    _recorder = Recorder(record_dir)
+    log.info("Recording upstream responses to %s", record_dir)
+    return _recorder
+
+
+def start_replay(replay_dir: str, latency_ms: tuple[float, float] = (0.0, 0.0)) -> StandIn:
+    global _standin
+    _standin = StandIn(replay_dir, latency_ms).start()
+    return _standin
+
+
+def stop() -> None:
+    global _recorder, _standin
+    if _recorder is not None:
+        log.info("Recorded %d upstream responses to %s", _recorder.saved, _recorder.record_dir)
+        _recorder = None
+    if _standin is not None:
+        _standin.stop()
+        _standin = None
+
+
+def get_recorder() -> Recorder | None:
+    return _recorder
+
+
+def upstream_url(url: str) -> str:
+    """The URL to actually hit for `url`: the stand-in's copy while replaying, else `url` itself."""
+    return _standin.local_url(url) if _standin is not None else url
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+import requests
+
+from arrbo_ingest.ratelimit import NBA_STATS_HOST
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    json.JSONDecodeError,
+    # socket-level errors raised outside requests (socket.timeout is TimeoutError)
+    TimeoutError,
+    ConnectionResetError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling upstream because the host's circuit breaker is open."""
+
+
+class RetryBudgetExhausted(RuntimeError):
+    """Raised when the run-wide retry budget is spent."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Only known-transient upstream problems are retryable: timeouts, dropped
+    connections, 429/5xx, and non-JSON bodies (stats.nba.com answers throttled
+    requests with an HTML/empty page). Everything else, including the other
+    requests/OSError subclasses (bad URL, too many redirects, permissions), is
+    fatal: retrying it would only drain the retry budget and trip the breaker.
+    """
+    if isinstance(exc, (CircuitOpenError, RetryBudgetExhausted)):
+        return False
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker. After `failure_threshold` consecutive retryable failures it
+    opens and rejects calls for `reset_timeout_s`; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout_s: float = 60.0) -> None:
+        self.host = host
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = "half-open"
+                self._trial_in_flight = False
+            if self.state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(f"Circuit open for {self.host}")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                log.info("Circuit for %s closed", self.host)
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    log.warning("Circuit for %s opened after %d failures", self.host, self._failures)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class RetryBudget:
+    """Caps the total number of retries (not first attempts) across a whole run."""
+
+    def __init__(self, max_retries: int) -> None:
+        self.max_retries = max(0, int(max_retries))
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+
+@dataclass
+class HostMetrics:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    short_circuited: int = 0
+    backoff_s: float = 0.0
+
+
+def backoff_delay(attempt: int, base_sleep: float, max_sleep: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max_sleep, base_sleep * 2**attempt))."""
+    return random.uniform(0.0, min(max_sleep, base_sleep * (2 ** attempt)))
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_metrics: dict[str, HostMetrics] = {}
+_budget: RetryBudget | None = None
+_guard = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _guard:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                host,
+                failure_threshold=int(os.getenv("ARRBO_BREAKER_THRESHOLD", "5")),
+                reset_timeout_s=float(os.getenv("ARRBO_BREAKER_RESET_S", "60")),
+            )
+            _breakers[host] = breaker
+        return breaker
+
+
+def get_budget() -> RetryBudget:
+    global _budget
+    with _guard:
+        if _budget is None:
+            _budget = RetryBudget(int(os.getenv("ARRBO_RETRY_BUDGET", "40")))
+        return _budget
+
+
+def _host_metrics(host: str) -> HostMetrics:
+    with _guard:
+        return _metrics.setdefault(host, HostMetrics())
+
+
+def _bump(host: str, **deltas: float) -> None:
+    m = _host_metrics(host)
+    with _guard:
+        for name, delta in deltas.items():
+            setattr(m, name, getattr(m, name) + delta)
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    *,
+    host: str = NBA_STATS_HOST,
+    attempts: int = 4,
+    base_sleep: float = 1.0,
+    max_sleep: float = 20.0,
+    retry_on: tuple[type[BaseException], ...] = (),
+) -> T:
+    """
+    Call fn with the shared retry policy for `host`: breaker check before every
+    attempt, retries only for retryable errors (see is_retryable, plus retry_on),
+    each retry spends one unit of the run-wide budget, jittered capped backoff.
+    """
+    breaker = get_breaker(host)
+    budget = get_budget()
+    _bump(host, calls=1)
+
+    for i in range(attempts):
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            _bump(host, short_circuited=1)
+            raise
+
+        _bump(host, attempts=1)
+        try:
+            result = fn()
+        except Exception as e:
+            retryable = is_retryable(e) or isinstance(e, retry_on)
+            if retryable:
+                breaker.record_failure()
+            else:
+                # the host answered; a fatal error says nothing about its health
+                breaker.record_success()
+            # no point sleeping for a retry the breaker would reject anyway
+            if not retryable or i == attempts - 1 or breaker.state == "open":
+                _bump(host, failures=1)
+                raise
+            if not budget.try_spend():
+                _bump(host, failures=1)
+                raise RetryBudgetExhausted(
+                    f"Retry budget of {budget.max_retries} exhausted; last error from {host}: {e}"
+                ) from e
+
+            sleep_for = backoff_delay(i, base_sleep, max_sleep)
+            log.warning(
+                "Request to %s failed (attempt %d/%d): %s | sleeping %.2fs",
+                host, i + 1, attempts, e, sleep_for
+            )
+            _bump(host, retries=1, backoff_s=sleep_for)
+            time.sleep(sleep_for)
+            continue
+
+        breaker.record_success()
+        return result
+
+    raise RuntimeError("Unknown retry failure")
+
+
+def metrics_snapshot() -> dict[str, HostMetrics]:
+    with _guard:
+        return {host: HostMetrics(**vars(m)) for host, m in _metrics.items()}
+
+
+def log_summary() -> None:
+    budget = get_budget()
+    for host, m in metrics_snapshot().items():
+        log.info(
+            "Upstream %s: calls=%d attempts=%d retries=%d failures=%d short_circuited=%d backoff=%.2fs breaker=%s",
+            host, m.calls, m.attempts, m.retries, m.failures, m.short_circuited, m.backoff_s,
+            get_breaker(host).state,
+        )
+    log.info("Retry budget used: %d/%d", budget.spent, budget.max_retries)
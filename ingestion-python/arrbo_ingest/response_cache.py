@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 15 * 60
+DEFAULT_MAX_MB = 256
+
+# Only these response headers are kept; enough to revalidate and to rebuild the response
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def cache_key(method: str, url: str) -> str:
+    """Content address of a request: sha256 over the method and the full URL (endpoint + sorted params)."""
+    return hashlib.sha256(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    stored_at: float
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidating this entry (empty if upstream sent none)."""
+        out = {}
+        if self.headers.get("ETag"):
+            out["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            out["If-Modified-Since"] = self.headers["Last-Modified"]
+        return out
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = "utf-8"
+        return response
+
+
+class ResponseCache:
+    """
+    On-disk cache of successful JSON responses. Each entry is one gzip file named
+    by cache_key(); it is served without a request while younger than ttl_s, and
+    revalidated with If-None-Match / If-Modified-Since after that when upstream
+    gave validators. File mtime is the LRU clock (touched on every hit) and the
+    oldest files are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, ttl_s: float = DEFAULT_TTL_S, max_bytes: int = DEFAULT_MAX_MB << 20) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_s = ttl_s
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) for every cache file."""
+        out = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.stored_at <= self.ttl_s
+
+    def load(self, key: str) -> CachedResponse | None:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)  # LRU touch
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("Ignoring unreadable response cache file %s: %s", path, e)
+            return None
+        return CachedResponse(url=meta["url"], stored_at=meta["stored_at"], headers=meta["headers"], body=body)
+
+    def store(self, key: str, response: requests.Response) -> CachedResponse:
+        entry = CachedResponse(
+            url=response.url,
+            stored_at=time.time(),
+            body=response.content,
+            headers={h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers},
+        )
+        self._write(key, entry)
+        return entry
+
+    def refresh(self, key: str, entry: CachedResponse) -> None:
+        """Upstream answered 304: the cached body is good for another ttl_s."""
+        entry.stored_at = time.time()
+        self._write(key, entry)
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        meta = {"url": entry.url, "stored_at": entry.stored_at, "headers": entry.headers}
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # meta on the first line, raw body after it
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(entry.body)
+            new_size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("Could not write response cache file %s: %s", path, e)
+            return
+        with self._lock:
+            self._size += new_size - old_size
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> int:
+        with self._lock:
+            entries = sorted(self._entries())
+            size = sum(s for _, s, _ in entries)
+            evicted = 0
+            for _, s, path in entries:
+                if size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= s
+                evicted += 1
+            self._size = size
+        if evicted:
+            log.info("Evicted %d response cache files from %s (%d bytes kept)", evicted, self.cache_dir, size)
+        return evicted
+
+
+def is_cacheable(response: requests.Response) -> bool:
+    # stats.nba.com answers throttled requests with 200 + an HTML page; never keep those
+    return response.status_code == 200 and "json" in response.headers.get("Content-Type", "")
+
+
+def cache_from_env(cache_dir: str | None = None, *, enabled: bool = True) -> ResponseCache | None:
+    """
+    Response cache for this run, or None when disabled. cache_dir defaults to
+    ARRBO_HTTP_CACHE_DIR; sized by ARRBO_HTTP_CACHE_TTL (seconds) and ARRBO_HTTP_CACHE_MAX_MB.
+    """
+    cache_dir = cache_dir or os.getenv("ARRBO_HTTP_CACHE_DIR")
+    if not enabled or not cache_dir:
+        return None
+    return ResponseCache(
+        cache_dir,
+        ttl_s=float(os.getenv("ARRBO_HTTP_CACHE_TTL", str(DEFAULT_TTL_S))),
+        max_bytes=int(float(os.getenv("ARRBO_HTTP_CACHE_MAX_MB", str(DEFAULT_MAX_MB))) * (1 << 20)),
+    )
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+import pandas as pd
+from nba_api.stats.endpoints import commonteamroster
+
+from arrbo_ingest.config import TEAM_ID_MAPPING
+from arrbo_ingest.ratelimit import fetch_many, get_limiter
+from arrbo_ingest.resilience import call_with_retries
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 6 * 60 * 60
+
+
+class RosterCache:
+    """
+    Two-tier cache of CommonTeamRoster frames keyed by (team_id, season).
+    The in-process tier lives for the whole run; the optional on-disk tier
+    (cache_dir) survives reruns and is evicted by file age (ttl_s). Files are
+    plain JSON, never pickle: loading them must not be able to run code.
+    Cached frames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, cache_dir: str | None = None, ttl_s: float = DEFAULT_TTL_S) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_s = ttl_s
+        self._mem: dict[tuple[int, str], pd.DataFrame] = {}
+        self._locks: dict[tuple[int, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.evict_expired()
+
+    def _path(self, key: tuple[int, str]) -> str:
+        team_id, season = key
+        return os.path.join(self.cache_dir or "", f"roster_{season}_{team_id}.json")
+
+    def _key_lock(self, key: tuple[int, str]) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _count(self, hit: bool) -> None:
+        with self._guard:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _is_expired(self, path: str) -> bool:
+        return time.time() - os.path.getmtime(path) > self.ttl_s
+
+    def evict_expired(self) -> int:
+        if not self.cache_dir:
+            return 0
+        evicted = 0
+        for name in os.listdir(self.cache_dir):
+            if not (name.startswith("roster_") and name.endswith(".json")):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if self._is_expired(path):
+                    os.remove(path)
+                    evicted += 1
+            except OSError:
+                continue
+        if evicted:
+            log.info("Evicted %d expired roster cache files from %s", evicted, self.cache_dir)
+        return evicted
+
+    def _read_disk(self, key: tuple[int, str]) -> pd.DataFrame | None:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            if self._is_expired(path):
+                os.remove(path)
+                return None
+            # dtype/convert_dates off: keep the API's values as they were (jersey "00" stays a string)
+            return pd.read_json(path, orient="split", dtype=False, convert_dates=False)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("Ignoring unreadable roster cache file %s: %s", path, e)
+            return None
+
+    def _write_disk(self, key: tuple[int, str], df: pd.DataFrame) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_json(tmp, orient="split", index=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("Could not write roster cache file %s: %s", path, e)
+
+    def get(self, team_id: int, season: str, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        key = (int(team_id), season)
+
+        # Per-key lock so concurrent jobs asking for the same team wait for one fetch
+        with self._key_lock(key):
+            df = self._mem.get(key)
+            if df is not None:
+                self._count(hit=True)
+                return df
+
+            df = self._read_disk(key)
+            if df is not None:
+                self._count(hit=True)
+                self._mem[key] = df
+                return df
+
+            self._count(hit=False)
+            df = fetch()
+            self._mem[key] = df
+            self._write_disk(key, df)
+            return df
+
+
+_cache: RosterCache | None = None
+_cache_guard = threading.Lock()
+
+
+def get_cache() -> RosterCache:
+    """Process-wide roster cache, configured from ARRBO_ROSTER_CACHE_DIR / ARRBO_ROSTER_CACHE_TTL."""
+    global _cache
+    with _cache_guard:
+        if _cache is None:
+            _cache = RosterCache(
+                cache_dir=os.getenv("ARRBO_ROSTER_CACHE_DIR") or None,
+                ttl_s=float(os.getenv("ARRBO_ROSTER_CACHE_TTL", str(DEFAULT_TTL_S))),
+            )
+        return _cache
+
+
+def get_team_roster(team_id: int, season: str, timeout: int = 60) -> pd.DataFrame:
+    def fetch():
+        # pacing comes from the shared stats.nba.com limiter, one token per attempt
+        with get_limiter():
+            return commonteamroster.CommonTeamRoster(
+                team_id=team_id,
+                season=season,
+                timeout=timeout,
+            ).get_data_frames()[0]
+
+    return get_cache().get(team_id, season, lambda: call_with_retries(fetch, attempts=4, base_sleep=1.0))
+
+
+def load_rosters(season: str, timeout: int = 60) -> tuple[dict[int, pd.DataFrame], list[str]]:
+    """
+    One fetch pass over every team in TEAM_ID_MAPPING.
+    Returns ({nba_team_id: roster_df}, [failed nba_team_id strings]).
+    """
+    t0 = time.perf_counter()
+    rosters, errors = fetch_many(
+        lambda team_id: get_team_roster(team_id, season, timeout=timeout),
+        [int(nba_team_id) for nba_team_id in TEAM_ID_MAPPING.keys()],
+    )
+
+    failed_teams: list[str] = []
+    for team_id, e in errors.items():
+        log.warning("Failed to fetch roster for team %s: %s", team_id, e)
+        failed_teams.append(str(team_id))
+
+    cache = get_cache()
+    log.info(
+        "Roster pass complete: %d teams in %.2fs (cache hits=%d misses=%d)",
+        len(rosters), time.perf_counter() - t0, cache.hits, cache.misses,
+    )
+    return rosters, failed_teams
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    fn: Callable[[], None]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class JobResult:
+    name: str
+    status: str  # "ok" | "failed" | "skipped"
+    elapsed_s: float = 0.0
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def _validate(jobs: Sequence[Job]) -> dict[str, Job]:
+    by_name: dict[str, Job] = {}
+    for job in jobs:
+        if job.name in by_name:
+            raise ValueError(f"Duplicate job name: {job.name}")
+        by_name[job.name] = job
+
+    for job in jobs:
+        for dep in job.deps:
+            if dep not in by_name:
+                raise ValueError(f"Job {job.name} depends on unknown job {dep}")
+
+    # Kahn's algorithm, only to reject cycles up front
+    indegree = {name: len(job.deps) for name, job in by_name.items()}
+    ready = [name for name, n in indegree.items() if n == 0]
+    visited = 0
+    while ready:
+        name = ready.pop()
+        visited += 1
+        for other in by_name.values():
+            if name in other.deps:
+                indegree[other.name] -= 1
+                if indegree[other.name] == 0:
+                    ready.append(other.name)
+    if visited != len(by_name):
+        raise ValueError("Job graph contains a cycle")
+
+    return by_name
+
+
+def _run_timed(job: Job) -> float:
+    t0 = time.perf_counter()
+    log.info("Job %s started", job.name)
+    job.fn()
+    return time.perf_counter() - t0
+
+
+def run_dag(jobs: Sequence[Job], *, max_parallel: int = 4) -> list[JobResult]:
+    """
+    Run jobs as a DAG with at most max_parallel jobs in flight.
+    A failed job does not stop independent jobs; its dependents are skipped.
+    Results are returned in the order the jobs were given.
+    """
+    by_name = _validate(jobs)
+    max_parallel = max(1, int(max_parallel))
+
+    results: dict[str, JobResult] = {}
+    pending = dict(by_name)
+    running: dict[Future, tuple[Job, float]] = {}
+    t_start = time.perf_counter()
+
+    def skip_dependents(failed: str) -> None:
+        for other in list(pending.values()):
+            if failed in other.deps:
+                del pending[other.name]
+                results[other.name] = JobResult(other.name, "skipped")
+                log.warning("Job %s skipped: dependency %s did not succeed", other.name, failed)
+                skip_dependents(other.name)
+
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="ingest") as ex:
+        while pending or running:
+            ready = [
+                job for job in pending.values()
+                if all(results.get(dep) is not None and results[dep].ok for dep in job.deps)
+            ]
+            for job in ready[: max_parallel - len(running)]:
+                del pending[job.name]
+                running[ex.submit(_run_timed, job)] = (job, time.perf_counter())
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job, submitted = running.pop(fut)
+                try:
+                    elapsed = fut.result()
+                    results[job.name] = JobResult(job.name, "ok", elapsed)
+                    log.info("Job %s finished in %.2fs", job.name, elapsed)
+                except Exception as e:
+                    elapsed = time.perf_counter() - submitted
+                    results[job.name] = JobResult(job.name, "failed", elapsed, e)
+                    log.error("Job %s failed after %.2fs: %s", job.name, elapsed, e, exc_info=e)
+                    skip_dependents(job.name)
+
+    total = time.perf_counter() - t_start
+    ordered = [results[job.name] for job in jobs]
+    serial = sum(r.elapsed_s for r in ordered)
+    log.info(
+        "DAG complete in %.2fs (serial sum %.2fs, max_parallel=%d): %s",
+        total, serial, max_parallel,
+        ", ".join(f"{r.name}={r.status}/{r.elapsed_s:.1f}s" for r in ordered),
+    )
+    return ordered
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import pandas as pd
+
+
+def column(df: pd.DataFrame, name: str) -> pd.Series:
+    """df[name], or an all-missing column when the upstream payload does not carry it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def clean_str(s: pd.Series) -> pd.Series:
+    """Strip whitespace; None/NaN become ''."""
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+
+def to_float(s: pd.Series) -> pd.Series:
+    """Numeric coercion; anything unparseable becomes NaN."""
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def to_int(s: pd.Series, default: int = 0) -> pd.Series:
+    """Numeric coercion to int64; None/NaN/garbage become `default`."""
+    return pd.to_numeric(s, errors="coerce").fillna(default).astype("int64")
+
+
+def to_utc_datetime(s: pd.Series) -> pd.Series:
+    """ISO strings (with or without Z) to tz-aware UTC datetimes; unparseable becomes None."""
+    ts = pd.to_datetime(s, utc=True, errors="coerce")
+    return ts.astype(object).where(ts.notna(), None)
+
+
+def to_rows(df: pd.DataFrame, columns: Sequence[str]) -> list[tuple[Any, ...]]:
+    """
+    Row tuples ready for copy_rows()/refresh_table(). Series.tolist() converts
+    numpy scalars to plain Python values, which is what psycopg adapts.
+    """
+    if df.empty:
+        return []
+    return list(zip(*(df[c].tolist() for c in columns)))
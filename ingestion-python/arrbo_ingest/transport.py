@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from nba_api.stats.library.http import NBAStatsHTTP
+
+from arrbo_ingest.replay import Recorder
+from arrbo_ingest.response_cache import ResponseCache, cache_key, is_cacheable
+
+log = logging.getLogger(__name__)
+
+# nba_api formats this with the endpoint name; kept to undo a base URL override
+DEFAULT_STATS_BASE_URL = NBAStatsHTTP.base_url
+
+
+@dataclass
+class TransportMetrics:
+    requests: int = 0
+    errors: int = 0
+    bytes_in: int = 0
+    elapsed_s: float = 0.0
+    max_s: float = 0.0
+    cache_hits: int = 0
+    not_modified: int = 0
+
+
+class TransportSession(requests.Session):
+    """
+    requests.Session with keep-alive pools sized for the run's concurrency, and
+    per-host timing / bytes-received metrics for every request sent through it.
+    With a ResponseCache, GETs are answered from disk while fresh and revalidated
+    with conditional requests once stale. With a Recorder, every response handed
+    back to the caller is also written out for --replay.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 4,
+        cache: ResponseCache | None = None,
+        recorder: Recorder | None = None,
+    ) -> None:
+        super().__init__()
+        self.cache = cache
+        self.recorder = recorder
+        # Retries are owned by resilience.call_with_retries, never by urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, int(pool_maxsize)), max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self._metrics: dict[str, TransportMetrics] = {}
+        self._metrics_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):  # type: ignore[override]
+        response = self._cached(method, url, *args, **kwargs)
+        if self.recorder is not None:
+            self.recorder.save(
+                response.url, response.status_code, response.headers.get("Content-Type", ""), response.text
+            )
+        return response
+
+    def _cached(self, method, url, *args, **kwargs):
+        if self.cache is None or method.upper() != "GET":
+            return self._send(method, url, *args, **kwargs)
+
+        host = urlsplit(url).netloc
+        full_url = requests.Request(method, url, params=kwargs.get("params")).prepare().url
+        key = cache_key(method, full_url)
+        entry = self.cache.load(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.record("hits")
+            self._bump(host, "cache_hits")
+            log.debug("cache hit %s", full_url)
+            return entry.to_response()
+
+        if entry is not None and entry.validators:
+            # never mutate the caller's dict: nba_api passes its class-level STATS_HEADERS
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.validators}
+
+        response = self._send(method, url, *args, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.cache.record("revalidated")
+            self._bump(host, "not_modified")
+            self.cache.refresh(key, entry)
+            return entry.to_response()
+
+        self.cache.record("misses")
+        if is_cacheable(response):
+            self.cache.store(key, response)
+        return response
+
+    def _send(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc
+        t0 = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            self._record(host, time.perf_counter() - t0, 0, error=True)
+            raise
+        elapsed = time.perf_counter() - t0
+        self._record(host, elapsed, len(response.content), error=response.status_code >= 400)
+        log.debug(
+            "%s %s -> %d (%d bytes, %.0f ms)",
+            method, urlsplit(response.url).path, response.status_code, len(response.content), elapsed * 1000,
+        )
+        return response
+
+    def _record(self, host: str, elapsed: float, n_bytes: int, *, error: bool) -> None:
+        with self._metrics_lock:
+            m = self._metrics.setdefault(host, TransportMetrics())
+            m.requests += 1
+            m.errors += int(error)
+            m.bytes_in += n_bytes
+            m.elapsed_s += elapsed
+            m.max_s = max(m.max_s, elapsed)
+
+    def _bump(self, host: str, name: str) -> None:
+        with self._metrics_lock:
+            m = self._metrics.setdefault(host, TransportMetrics())
+            setattr(m, name, getattr(m, name) + 1)
+
+    def metrics_snapshot(self) -> dict[str, TransportMetrics]:
+        with self._metrics_lock:
+            return {host: TransportMetrics(**vars(m)) for host, m in self._metrics.items()}
+
+    def connections_opened(self) -> int:
+        """TCP/TLS connections opened so far across every mounted pool (i.e. handshakes paid)."""
+        opened = 0
+        for adapter in {id(a): a for a in self.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+        return opened
+
+
+_session: TransportSession | None = None
+_guard = threading.Lock()
+
+
+def install_transport(
+    session: requests.Session | None = None,
+    *,
+    base_url: str | None = None,
+    cache: ResponseCache | None = None,
+    recorder: Recorder | None = None,
+) -> requests.Session:
+    """
+    Route every nba_api stats endpoint call through one shared session.
+
+    `session` defaults to a TransportSession sized from ARRBO_HTTP_MAX_IN_FLIGHT,
+    reading through `cache` and writing to `recorder` when given.
+    `base_url` (default: ARRBO_NBA_STATS_BASE_URL) points the endpoints at another
+    server, e.g. a local stub in tests: "http://127.0.0.1:8000/stats".
+    """
+    global _session
+    if session is None:
+        session = TransportSession(
+            pool_maxsize=int(os.getenv("ARRBO_HTTP_MAX_IN_FLIGHT", "4")),
+            cache=cache,
+            recorder=recorder,
+        )
+    base_url = base_url or os.getenv("ARRBO_NBA_STATS_BASE_URL")
+
+    with _guard:
+        NBAStatsHTTP.set_session(session)
+        if base_url:
+            NBAStatsHTTP.base_url = base_url.rstrip("/") + "/{endpoint}"
+            log.info("nba_api stats endpoints redirected to %s", base_url)
+        else:
+            NBAStatsHTTP.base_url = DEFAULT_STATS_BASE_URL
+        _session = session if isinstance(session, TransportSession) else None
+    return session
+
+
+def uninstall_transport() -> None:
+    """Close the shared session and restore nba_api's defaults."""
+    global _session
+    with _guard:
+        session = NBAStatsHTTP.get_session()
+        NBAStatsHTTP.set_session(None)
+        NBAStatsHTTP.base_url = DEFAULT_STATS_BASE_URL
+        _session = None
+    session.close()
+
+
+def get_transport() -> TransportSession | None:
+    return _session
+
+
+def log_transport_summary() -> None:
+    session = _session
+    if session is None:
+        return
+    for host, m in session.metrics_snapshot().items():
+        log.info(
+            "Transport %s: requests=%d errors=%d bytes_in=%d total=%.2fs avg=%.0fms max=%.0fms "
+            "cache_hits=%d not_modified=%d",
+            host, m.requests, m.errors, m.bytes_in, m.elapsed_s,
+            (m.elapsed_s / m.requests * 1000) if m.requests else 0.0, m.max_s * 1000,
+            m.cache_hits, m.not_modified,
+        )
+    log.info("Transport connections opened: %d", session.connections_opened())
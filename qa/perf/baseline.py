@@ -0,0 +1,181 @@
+import contextlib
+import datetime as dt
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator
+
+from qa.perf.histogram import Histogram
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the store is then unlocked
+    fcntl = None
+
+STORE_VERSION = 1
+
+
+@dataclass
+class GateConfig:
+    path: str = os.path.join("test-artifacts", "perf", "baseline.json")
+    keep: int = 20          # runs kept per endpoint
+    min_runs: int = 3       # runs needed before the gate is enforced
+    alpha: float = 0.01     # one-sided Mann-Whitney significance level
+    min_change: float = 0.10  # and p50 or p95 must be at least this much slower
+
+    @classmethod
+    def from_env(cls) -> "GateConfig":
+        d = cls()
+        return cls(
+            path=os.getenv("PERF_BASELINE_PATH", d.path),
+            keep=int(os.getenv("PERF_BASELINE_KEEP", str(d.keep))),
+            min_runs=int(os.getenv("PERF_BASELINE_MIN_RUNS", str(d.min_runs))),
+            alpha=float(os.getenv("PERF_REGRESSION_ALPHA", str(d.alpha))),
+            min_change=float(os.getenv("PERF_REGRESSION_MIN_CHANGE", str(d.min_change))),
+        )
+
+
+@dataclass
+class MannWhitney:
+    u: float
+    z: float
+    p_value: float
+    # P(random new latency > random baseline latency); 0.5 = no difference
+    effect: float
+
+
+def mann_whitney_greater(new: Histogram, base: Histogram) -> MannWhitney:
+    """
+    One-sided Mann-Whitney U (H1: `new` is stochastically larger) computed on the
+    shared bucket grid: samples in one bucket are ties. Normal approximation with
+    tie correction; fine at the sample sizes perf runs produce.
+    """
+    n1, n2 = new.count, base.count
+    if not n1 or not n2:
+        return MannWhitney(0.0, 0.0, 1.0, 0.5)
+
+    u = 0.0
+    below = 0
+    tie_term = 0
+    for idx in sorted(set(new.counts) | set(base.counts)):
+        a = new.counts.get(idx, 0)
+        b = base.counts.get(idx, 0)
+        u += a * (below + b / 2.0)
+        below += b
+        t = a + b
+        tie_term += t * t * t - t
+
+    n = n1 + n2
+    mean = n1 * n2 / 2.0
+    var = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1)))
+    if var <= 0:
+        return MannWhitney(u, 0.0, 1.0, u / (n1 * n2))
+    z = (u - mean - 0.5) / math.sqrt(var)  # continuity correction
+    return MannWhitney(u, z, 0.5 * math.erfc(z / math.sqrt(2.0)), u / (n1 * n2))
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    # pytest-xdist workers share the store
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_store(path: str) -> dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            store = json.load(f)
+    except FileNotFoundError:
+        return {"version": STORE_VERSION, "endpoints": {}}
+    if store.get("version") != STORE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline store version {store.get('version')}")
+    return store
+
+
+def _save_store(path: str, store: dict[str, Any]) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(store, f)
+    os.replace(tmp, path)
+
+
+def _change(new: float, old: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(name: str, report: dict[str, Any], runs: list[dict[str, Any]], cfg: GateConfig) -> dict[str, Any]:
+    new = Histogram.decode(report["histogram"])
+    base = Histogram()
+    for run in runs:
+        base.merge(Histogram.decode(run["histogram"]))
+
+    diff: dict[str, Any] = {
+        "endpoint": name,
+        "baseline_runs": len(runs),
+        "gate": asdict(cfg),
+        "new": {"count": new.count, **new.summary()},
+        "baseline": {"count": base.count, **base.summary()},
+    }
+    diff["change"] = {
+        key: _change(diff["new"][key], diff["baseline"][key])
+        for key in ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+    }
+    if len(runs) < cfg.min_runs:
+        diff.update(status="collecting", regressed=False)
+        return diff
+
+    mw = mann_whitney_greater(new, base)
+    diff["mann_whitney"] = asdict(mw)
+    slower = max(diff["change"]["p50_ms"], diff["change"]["p95_ms"]) >= cfg.min_change
+    regressed = mw.p_value < cfg.alpha and slower
+    diff.update(status="regressed" if regressed else "ok", regressed=regressed)
+    return diff
+
+
+def load_shape_key(name: str, report: dict[str, Any]) -> str:
+    """
+    Store key for a LoadReport dict: runs are only comparable at the same load shape,
+    i.e. mode, concurrency (closed) or target rate (open), and generator processes
+    (PERF_WORKERS defaults to the runner's core count).
+    """
+    workers = report["client"]["processes"]
+    if report["mode"] == "open":
+        return f"{name}.open.r{report['target_rps']:g}.w{workers}"
+    return f"{name}.closed.c{report['concurrency']}.w{workers}"
+
+
+def check_and_record(name: str, report: dict[str, Any], cfg: GateConfig | None = None) -> dict[str, Any]:
+    """
+    Compare `report` with the stored runs for `name`, write <name>.diff.json next to
+    the baseline store and, unless it regressed, append the run to the store.
+    Returns the diff; diff["regressed"] is what the caller should fail on.
+    """
+    cfg = cfg or GateConfig.from_env()
+    with _locked(cfg.path):
+        store = load_store(cfg.path)
+        runs = store["endpoints"].get(name, [])
+        diff = compare(name, report, runs, cfg)
+
+        if not diff["regressed"]:
+            runs.append({
+                "at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                "commit": os.getenv("GITHUB_SHA"),
+                "summary": diff["new"],
+                "histogram": report["histogram"],
+            })
+            store["endpoints"][name] = runs[-cfg.keep:]
+            _save_store(cfg.path, store)
+
+    out = os.path.join(os.path.dirname(cfg.path) or ".", f"{name}.diff.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(diff, f, indent=2)
+    return diff
@@ -0,0 +1,35 @@
+import json
+import os
+import time
+from typing import Any
+
+from qa.perf.distributed import default_workers
+
+ARTIFACT_DIR = os.path.join("test-artifacts", "perf")
+
+
+def perf_config() -> dict[str, Any]:
+    duration = os.getenv("PERF_DURATION_S")
+    rate = os.getenv("PERF_RATE")
+    return {
+        "base_url": os.getenv("PERF_API_BASE_URL", "http://localhost:8080").rstrip("/"),
+        "date": os.getenv("PERF_GAMES_DATE") or time.strftime("%Y-%m-%d"),
+        # closed = PERF_CONCURRENCY workers back to back; open = PERF_RATE req/s on a fixed schedule
+        "mode": os.getenv("PERF_MODE", "closed"),
+        "total": None if duration else int(os.getenv("PERF_TOTAL", "100")),
+        "duration_s": float(duration) if duration else None,
+        "rate": float(rate) if rate else None,
+        "concurrency": int(os.getenv("PERF_CONCURRENCY", "10")),
+        "warmup_s": float(os.getenv("PERF_WARMUP_S", "2")),
+        "timeout_s": float(os.getenv("PERF_TIMEOUT_S", "5")),
+        # load generator processes (default: one per core); 1 = run in the pytest process
+        "workers": int(os.getenv("PERF_WORKERS") or default_workers()),
+    }
+
+
+def write_artifact(name: str, payload: dict[str, Any]) -> str:
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = os.path.join(ARTIFACT_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
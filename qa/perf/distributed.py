@@ -0,0 +1,77 @@
+import dataclasses
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from qa.perf import loadgen
+from qa.perf.loadgen import LoadReport, LoadSpec
+
+# Time given to spawned workers to import and open their sessions before the common start
+STARTUP_GRACE_S = 2.0
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _share(n: int, parts: int, i: int) -> int:
+    return n // parts + (1 if i < n % parts else 0)
+
+
+def split_spec(spec: LoadSpec, workers: int) -> list[LoadSpec]:
+    """
+    One spec per worker so that together they generate `spec`:
+    closed = concurrency and total divided up; open = rate divided up, with each
+    worker's schedule phase-shifted so the merged arrivals stay evenly spaced.
+    """
+    if spec.mode == "closed":
+        workers = max(1, min(workers, spec.concurrency, spec.total or spec.concurrency))
+    else:
+        workers = max(1, min(workers, spec.total or workers))
+
+    out = []
+    for i in range(workers):
+        total = _share(spec.total, workers, i) if spec.total else None
+        if spec.mode == "closed":
+            out.append(dataclasses.replace(spec, concurrency=_share(spec.concurrency, workers, i), total=total))
+        else:
+            rate = float(spec.rate or 0.0)
+            out.append(dataclasses.replace(
+                spec,
+                rate=rate / workers,
+                total=total,
+                concurrency=max(1, _share(spec.concurrency, workers, i)),
+                max_in_flight=max(1, _share(spec.max_in_flight, workers, i)),
+                phase_s=spec.phase_s + i / rate,
+            ))
+    return out
+
+
+def _worker(spec: LoadSpec, start_at: float) -> dict[str, Any]:
+    return loadgen.run(spec, start_at=start_at).to_dict()
+
+
+def run_distributed(spec: LoadSpec, workers: int | None = None) -> LoadReport:
+    """
+    Fan `spec` out over `workers` local processes (default: one per core), each
+    with its own event loop, connection pools and histograms, all starting at the
+    same moment; the coordinator merges their reports. workers=1 runs in-process.
+    """
+    parts = split_spec(spec, workers or default_workers())
+    if len(parts) == 1:
+        return loadgen.run(parts[0])
+
+    # spawn: a clean interpreter per worker, no inherited event loop or sockets
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(parts), mp_context=ctx) as ex:
+        start_at = time.time() + STARTUP_GRACE_S
+        futures = [ex.submit(_worker, part, start_at) for part in parts]
+        results = [f.result() for f in futures]
+
+    merged = LoadReport.from_dict(parts[0], results[0])
+    merged.spec = spec
+    for part, result in zip(parts[1:], results[1:]):
+        merged.merge(LoadReport.from_dict(part, result))
+    return merged
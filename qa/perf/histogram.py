@@ -0,0 +1,226 @@
+import argparse
+import base64
+import json
+import math
+import sys
+import zlib
+from typing import Any, Iterable, Iterator
+
+# Values are recorded as integer microseconds. Below 2**SUB_BITS us every value has
+# its own bucket; above, each power of two is split into 2**(SUB_BITS-1) linear
+# buckets, so any recorded value is off by at most 1/2**(SUB_BITS-1) (~0.2%).
+SUB_BITS = 10
+_LINEAR = 1 << SUB_BITS
+_HALF = 1 << (SUB_BITS - 1)
+
+ENCODING_VERSION = 1
+
+
+def _index(v: int) -> int:
+    if v < _LINEAR:
+        return v
+    shift = v.bit_length() - SUB_BITS
+    return _LINEAR + (shift - 1) * _HALF + ((v >> shift) - _HALF)
+
+
+def _bounds(idx: int) -> tuple[int, int]:
+    """[lo, hi] microseconds covered by a bucket."""
+    if idx < _LINEAR:
+        return idx, idx
+    shift = (idx - _LINEAR) // _HALF + 1
+    mantissa = (idx - _LINEAR) % _HALF + _HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+def _varints(values: Iterable[int]) -> bytes:
+    out = bytearray()
+    for v in values:
+        while True:
+            b = v & 0x7F
+            v >>= 7
+            if v:
+                out.append(b | 0x80)
+            else:
+                out.append(b)
+                break
+    return bytes(out)
+
+
+def _read_varints(data: bytes) -> Iterator[int]:
+    v = shift = 0
+    for b in data:
+        v |= (b & 0x7F) << shift
+        if b & 0x80:
+            shift += 7
+        else:
+            yield v
+            v = shift = 0
+
+
+class Histogram:
+    """
+    Log-bucketed latency histogram (HdrHistogram layout, sparse counts). Memory is
+    bounded by the number of distinct buckets hit, not by the number of samples.
+    """
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.min_us: int | None = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def record(self, value_ms: float, count: int = 1) -> None:
+        v = max(0, int(round(value_ms * 1000.0)))
+        idx = _index(v)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.count += count
+        self.sum_us += v * count
+        self.max_us = max(self.max_us, v)
+        self.min_us = v if self.min_us is None else min(self.min_us, v)
+
+    def record_corrected(self, value_ms: float, expected_interval_ms: float | None) -> None:
+        """
+        Coordinated-omission correction for closed loops: a response slower than the
+        expected interval stalled its sender, so the requests it would have sent
+        meanwhile are back-filled as value - k*interval.
+        """
+        self.record(value_ms)
+        if not expected_interval_ms or expected_interval_ms <= 0:
+            return
+        missing = value_ms - expected_interval_ms
+        while missing >= expected_interval_ms:
+            self.record(missing)
+            missing -= expected_interval_ms
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        return self
+
+    @property
+    def min_ms(self) -> float:
+        return (self.min_us or 0) / 1000.0
+
+    @property
+    def max_ms(self) -> float:
+        return self.max_us / 1000.0
+
+    @property
+    def mean_ms(self) -> float:
+        return (self.sum_us / self.count / 1000.0) if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Value at quantile p (0..1), linearly interpolated between ranks like
+        numpy's default, with samples spread evenly across their bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = min(max(p, 0.0), 1.0) * (self.count - 1)
+        lo_rank = math.floor(rank)
+        lo = self._value_at_rank(lo_rank)
+        if rank == lo_rank:
+            return lo
+        return lo + (self._value_at_rank(lo_rank + 1) - lo) * (rank - lo_rank)
+
+    def _value_at_rank(self, rank: int) -> float:
+        seen = 0
+        for idx in sorted(self.counts):
+            n = self.counts[idx]
+            if rank < seen + n:
+                lo, hi = _bounds(idx)
+                lo = max(lo, self.min_us or 0)
+                hi = min(hi, self.max_us)
+                frac = (rank - seen + 0.5) / n
+                return (lo + (hi - lo) * frac) / 1000.0
+            seen += n
+        return self.max_ms
+
+    def distribution(self) -> list[tuple[float, float, int]]:
+        """[(bucket_lo_ms, bucket_hi_ms, count)] in value order."""
+        return [(_bounds(i)[0] / 1000.0, _bounds(i)[1] / 1000.0, self.counts[i]) for i in sorted(self.counts)]
+
+    def summary(self, prefix: str = "") -> dict[str, float]:
+        return {
+            f"{prefix}p50_ms": self.percentile(0.50),
+            f"{prefix}p90_ms": self.percentile(0.90),
+            f"{prefix}p95_ms": self.percentile(0.95),
+            f"{prefix}p99_ms": self.percentile(0.99),
+            f"{prefix}p999_ms": self.percentile(0.999),
+            f"{prefix}min_ms": self.min_ms,
+            f"{prefix}max_ms": self.max_ms,
+            f"{prefix}mean_ms": self.mean_ms,
+        }
+
+    def encode(self) -> dict[str, Any]:
+        """Compact, mergeable form: delta-coded (bucket, count) varints, zlib, base64."""
+        flat: list[int] = []
+        prev = 0
+        for idx in sorted(self.counts):
+            flat += [idx - prev, self.counts[idx]]
+            prev = idx
+        return {
+            "v": ENCODING_VERSION,
+            "sub_bits": SUB_BITS,
+            "unit": "us",
+            "count": self.count,
+            "min": self.min_us or 0,
+            "max": self.max_us,
+            "sum": self.sum_us,
+            "buckets": base64.b64encode(zlib.compress(_varints(flat), 9)).decode("ascii"),
+        }
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> "Histogram":
+        if data.get("v") != ENCODING_VERSION or data.get("sub_bits") != SUB_BITS:
+            raise ValueError(f"Unsupported histogram encoding v={data.get('v')} sub_bits={data.get('sub_bits')}")
+        h = cls()
+        values = list(_read_varints(zlib.decompress(base64.b64decode(data["buckets"]))))
+        idx = 0
+        for delta, n in zip(values[::2], values[1::2]):
+            idx += delta
+            h.counts[idx] = n
+        h.count = data["count"]
+        h.min_us = data["min"] if h.count else None
+        h.max_us = data["max"]
+        h.sum_us = data["sum"]
+        return h
+
+
+def load_artifact(path: str, key: str = "histogram") -> Histogram:
+    with open(path, encoding="utf-8") as f:
+        return Histogram.decode(json.load(f)[key])
+
+
+def merge_artifacts(paths: Iterable[str], key: str = "histogram") -> Histogram:
+    merged = Histogram()
+    for path in paths:
+        merged.merge(load_artifact(path, key))
+    return merged
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge perf artifact histograms and print their distribution")
+    parser.add_argument("artifacts", nargs="+", help="test-artifacts/perf/*.json files")
+    parser.add_argument("--key", default="histogram", help="histogram field (histogram | service_histogram)")
+    parser.add_argument("--out", default=None, help="write the merged histogram + summary as JSON here")
+    args = parser.parse_args(argv)
+
+    merged = merge_artifacts(args.artifacts, args.key)
+    summary = {"count": merged.count, **merged.summary()}
+    for name, value in summary.items():
+        print(f"{name:>10} {value:12.3f}" if isinstance(value, float) else f"{name:>10} {value:12d}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({**summary, args.key: merged.encode()}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
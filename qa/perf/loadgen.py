@@ -0,0 +1,320 @@
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import aiohttp
+
+from qa.perf.histogram import Histogram
+
+
+@dataclass
+class LoadSpec:
+    """
+    closed: `concurrency` workers, each with its own connection, send back to back
+            until `total` requests (or `duration_s`) are done.
+    open:   requests start on a fixed schedule of `rate` per second for `duration_s`
+            (or `total` requests) whatever the server does; at most `max_in_flight`
+            outstanding, spread over `concurrency` connection pools.
+    Warmup runs the same mode for `warmup_s` and is discarded.
+    """
+
+    url: str
+    mode: str = "closed"
+    total: int | None = 100
+    concurrency: int = 10
+    rate: float | None = None
+    duration_s: float | None = None
+    warmup_s: float = 0.0
+    timeout_s: float = 5.0
+    max_in_flight: int = 1000
+    # closed loop only: the interval a worker was expected to send at; slower responses get
+    # back-filled samples (coordinated-omission correction). None = warmup p50, if any.
+    expected_interval_ms: float | None = None
+    # open loop only: delay of the first arrival, so several generators can interleave their schedules
+    phase_s: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("closed", "open"):
+            raise ValueError(f"Unknown load mode {self.mode!r}")
+        if self.mode == "open" and not self.rate:
+            raise ValueError("open-loop mode needs a rate")
+        if not self.total and not self.duration_s:
+            raise ValueError("need total or duration_s")
+
+
+def is_error(status: int | None, error: str | None) -> bool:
+    """What every perf report counts as an error: no response at all, or a 5xx (the server gave up)."""
+    return error is not None or (status or 0) >= 500
+
+
+@dataclass
+class Sample:
+    intended: float
+    start: float
+    end: float
+    status: int | None
+    error: str | None
+
+    @property
+    def failed(self) -> bool:
+        return is_error(self.status, self.error)
+
+    @property
+    def service_ms(self) -> float:
+        return (self.end - self.start) * 1000.0
+
+    @property
+    def response_ms(self) -> float:
+        # from when the request should have been sent: includes time spent queued behind the load generator
+        return (self.end - self.intended) * 1000.0
+
+
+@dataclass
+class LoadReport:
+    spec: LoadSpec
+    latency: Histogram = field(default_factory=Histogram)
+    service: Histogram = field(default_factory=Histogram)
+    status_counts: dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    total: int = 0
+    elapsed_s: float = 0.0
+    expected_interval_ms: float | None = None
+    # client-side overhead: how late requests left vs. schedule, event-loop stalls, CPU burnt
+    send_slip: Histogram = field(default_factory=Histogram)
+    loop_lag: Histogram = field(default_factory=Histogram)
+    cpu_s: float = 0.0
+    processes: int = 1
+
+    def add(self, s: Sample) -> None:
+        self.total += 1
+        self.send_slip.record((s.start - s.intended) * 1000.0)
+        self.service.record(s.service_ms)
+        if self.spec.mode == "open":
+            self.latency.record(s.response_ms)
+        else:
+            self.latency.record_corrected(s.service_ms, self.expected_interval_ms)
+        if s.failed:
+            self.errors += 1
+        if s.error is None:
+            key = str(s.status)
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "mode": self.spec.mode,
+            "total": self.total,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.total) if self.total else 0.0,
+            **self.latency.summary(),
+            "service_p99_ms": self.service.percentile(0.99),
+            "target_rps": self.spec.rate,
+            "achieved_rps": (self.total / self.elapsed_s) if self.elapsed_s else 0.0,
+            "elapsed_s": self.elapsed_s,
+            "concurrency": self.spec.concurrency,
+            "expected_interval_ms": self.expected_interval_ms,
+            "status_counts": self.status_counts,
+            "client": self.client_overhead(),
+            # mergeable across workers/jobs: see qa.perf.histogram
+            "histogram": self.latency.encode(),
+            "service_histogram": self.service.encode(),
+            "send_slip_histogram": self.send_slip.encode(),
+            "loop_lag_histogram": self.loop_lag.encode(),
+        }
+
+    def client_overhead(self) -> dict[str, Any]:
+        """If these numbers are high, the load generator rather than the server is the bottleneck."""
+        return {
+            "processes": self.processes,
+            "cpu_s": self.cpu_s,
+            # CPU cores kept busy by the generator; close to `processes` means it is saturated
+            "cpu_cores_busy": (self.cpu_s / self.elapsed_s) if self.elapsed_s else 0.0,
+            "send_slip_p99_ms": self.send_slip.percentile(0.99),
+            "loop_lag_p99_ms": self.loop_lag.percentile(0.99),
+            "loop_lag_max_ms": self.loop_lag.max_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, spec: LoadSpec, d: dict[str, Any]) -> "LoadReport":
+        return cls(
+            spec=spec,
+            latency=Histogram.decode(d["histogram"]),
+            service=Histogram.decode(d["service_histogram"]),
+            status_counts=dict(d["status_counts"]),
+            errors=d["errors"],
+            total=d["total"],
+            elapsed_s=d["elapsed_s"],
+            expected_interval_ms=d.get("expected_interval_ms"),
+            send_slip=Histogram.decode(d["send_slip_histogram"]),
+            loop_lag=Histogram.decode(d["loop_lag_histogram"]),
+            cpu_s=d["client"]["cpu_s"],
+            processes=d["client"]["processes"],
+        )
+
+    def merge(self, other: "LoadReport") -> "LoadReport":
+        """Combine reports of generators that ran side by side over the same window."""
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+        self.send_slip.merge(other.send_slip)
+        self.loop_lag.merge(other.loop_lag)
+        for k, n in other.status_counts.items():
+            self.status_counts[k] = self.status_counts.get(k, 0) + n
+        self.errors += other.errors
+        self.total += other.total
+        self.elapsed_s = max(self.elapsed_s, other.elapsed_s)
+        self.cpu_s += other.cpu_s
+        self.processes += other.processes
+        return self
+
+
+async def _send(session: aiohttp.ClientSession, url: str, intended: float) -> Sample:
+    start = time.perf_counter()
+    try:
+        async with session.get(url) as r:
+            await r.read()
+            return Sample(intended, start, time.perf_counter(), r.status, None)
+    except Exception as e:
+        return Sample(intended, start, time.perf_counter(), None, repr(e))
+
+
+def _sessions(spec: LoadSpec) -> list[aiohttp.ClientSession]:
+    n = max(1, spec.concurrency)
+    per_pool = 1 if spec.mode == "closed" else max(1, math.ceil(spec.max_in_flight / n))
+    timeout = aiohttp.ClientTimeout(total=spec.timeout_s)
+    return [
+        aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=per_pool), timeout=timeout)
+        for _ in range(n)
+    ]
+
+
+Record = Callable[[Sample], None]
+
+
+async def _closed_loop(
+    spec: LoadSpec,
+    sessions: list[aiohttp.ClientSession],
+    total: int | None,
+    duration_s: float | None,
+    record: Record,
+) -> None:
+    tickets = itertools.count()
+    deadline = time.perf_counter() + duration_s if duration_s else None
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while True:
+            if total is not None and next(tickets) >= total:
+                return
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                return
+            record(await _send(session, spec.url, now))
+
+    await asyncio.gather(*(worker(s) for s in sessions))
+
+
+async def _open_loop(
+    spec: LoadSpec,
+    sessions: list[aiohttp.ClientSession],
+    total: int | None,
+    duration_s: float | None,
+    record: Record,
+) -> None:
+    slots = asyncio.Semaphore(max(1, spec.max_in_flight))
+    interval = 1.0 / float(spec.rate or 1.0)
+    tasks: set[asyncio.Task] = set()
+
+    async def fire(i: int, intended: float) -> None:
+        try:
+            record(await _send(sessions[i % len(sessions)], spec.url, intended))
+        finally:
+            slots.release()
+
+    t0 = time.perf_counter()
+    for i in itertools.count():
+        intended = t0 + spec.phase_s + i * interval
+        if total is not None and i >= total:
+            break
+        if duration_s is not None and intended - t0 >= duration_s:
+            break
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # When saturated this waits and the schedule slips; latency still counts from `intended`
+        await slots.acquire()
+        task = asyncio.create_task(fire(i, intended))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+
+
+async def open_loop(
+    spec: LoadSpec,
+    on_sample: Record,
+    on_start: Callable[[float], None] | None = None,
+) -> float:
+    """
+    Drive `spec` (open mode) like run_async, but hand every measured sample to
+    `on_sample` instead of a LoadReport, for callers that aggregate differently
+    (qa.perf.soak keeps per-window latency). Warmup samples are discarded;
+    `on_start(t0)` is called as measurement begins, on the time.perf_counter()
+    clock that Sample times use. Returns the measured elapsed seconds.
+    """
+    if spec.mode != "open":
+        raise ValueError("open_loop needs an open-mode spec")
+    sessions = _sessions(spec)
+    try:
+        if spec.warmup_s > 0:
+            await _open_loop(spec, sessions, None, spec.warmup_s, lambda s: None)
+        t0 = time.perf_counter()
+        if on_start is not None:
+            on_start(t0)
+        await _open_loop(spec, sessions, spec.total, spec.duration_s, on_sample)
+        return time.perf_counter() - t0
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions))
+
+
+async def _watch_loop_lag(lag: Histogram, period_s: float = 0.01) -> None:
+    while True:
+        t = time.perf_counter()
+        await asyncio.sleep(period_s)
+        lag.record((time.perf_counter() - t - period_s) * 1000.0)
+
+
+async def run_async(spec: LoadSpec, start_at: float | None = None) -> LoadReport:
+    """start_at: wall-clock time (time.time()) to start at, so several processes begin together."""
+    sessions = _sessions(spec)
+    loop = _open_loop if spec.mode == "open" else _closed_loop
+    report = LoadReport(spec)
+    try:
+        if start_at is not None:
+            await asyncio.sleep(max(0.0, start_at - time.time()))
+
+        warmup = Histogram()
+        if spec.warmup_s > 0:
+            await loop(spec, sessions, None, spec.warmup_s, lambda s: warmup.record(s.service_ms))
+
+        if spec.mode == "closed":
+            report.expected_interval_ms = spec.expected_interval_ms
+            if report.expected_interval_ms is None and warmup.count:
+                report.expected_interval_ms = warmup.percentile(0.50)
+
+        watcher = asyncio.create_task(_watch_loop_lag(report.loop_lag))
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        try:
+            await loop(spec, sessions, spec.total, spec.duration_s, report.add)
+        finally:
+            report.elapsed_s = time.perf_counter() - t0
+            report.cpu_s = time.process_time() - cpu0
+            watcher.cancel()
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions))
+    return report
+
+
+def run(spec: LoadSpec, start_at: float | None = None) -> LoadReport:
+    return asyncio.run(run_async(spec, start_at))
@@ -0,0 +1,261 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+
+from qa.perf.histogram import Histogram
+from qa.perf.loadgen import is_error
+
+
+@dataclass
+class EndpointStats:
+    latency: Histogram = field(default_factory=Histogram)
+    requests: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.requests) if self.requests else 0.0,
+            **self.latency.summary(),
+            "histogram": self.latency.encode(),
+        }
+
+
+@dataclass
+class MixReport:
+    endpoints: dict[str, EndpointStats] = field(default_factory=dict)
+    # time a scenario spent waiting on the API (think time excluded)
+    scenarios: dict[str, EndpointStats] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    def endpoint(self, name: str) -> EndpointStats:
+        return self.endpoints.setdefault(name, EndpointStats())
+
+    def scenario(self, name: str) -> EndpointStats:
+        return self.scenarios.setdefault(name, EndpointStats())
+
+    def to_dict(self) -> dict[str, Any]:
+        total = sum(e.requests for e in self.endpoints.values())
+        errors = sum(e.errors for e in self.endpoints.values())
+        overall = Histogram()
+        for e in self.endpoints.values():
+            overall.merge(e.latency)
+        return {
+            "total": total,
+            "errors": errors,
+            "error_rate": (errors / total) if total else 0.0,
+            "achieved_rps": (total / self.elapsed_s) if self.elapsed_s else 0.0,
+            "elapsed_s": self.elapsed_s,
+            **overall.summary(),
+            "histogram": overall.encode(),
+            "endpoints": {name: e.to_dict() for name, e in sorted(self.endpoints.items())},
+            "scenarios": {name: s.to_dict() for name, s in sorted(self.scenarios.items())},
+        }
+
+
+class HttpError(Exception):
+    pass
+
+
+class VirtualUser:
+    """One simulated browser tab: its own connection pool (6 per host, like a browser) and RNG."""
+
+    def __init__(self, base_url: str, report: MixReport, rng: random.Random, think_ms: float, timeout_s: float):
+        self.base_url = base_url
+        self.report = report
+        self.rng = rng
+        self.think_ms = think_ms
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=6),
+            timeout=aiohttp.ClientTimeout(total=timeout_s),
+        )
+        self.api_s = 0.0
+
+    async def get(self, path: str, endpoint: str, params: dict[str, str] | None = None) -> Any:
+        stats = self.report.endpoint(endpoint)
+        status, error, data = None, None, None
+        t0 = time.perf_counter()
+        try:
+            async with self.session.get(f"{self.base_url}{path}", params=params) as r:
+                status = r.status
+                body = await r.read()
+                if status < 400 and body:
+                    data = await r.json(content_type=None)
+        except Exception as e:
+            error = repr(e)
+        elapsed = time.perf_counter() - t0
+        stats.requests += 1
+        stats.latency.record(elapsed * 1000.0)
+        if is_error(status, error):
+            stats.errors += 1
+            raise HttpError(f"GET {path} failed: {error or status}")
+        # a 4xx is the API answering (e.g. unknown id): the view just shows nothing
+        return data
+
+    async def all(self, *calls: Awaitable[Any]) -> list[Any]:
+        """Parallel calls, like the views' Promise.all; wall time counts once."""
+        t0 = time.perf_counter()
+        try:
+            return await asyncio.gather(*calls)
+        finally:
+            self.api_s += time.perf_counter() - t0
+
+    async def one(self, call: Awaitable[Any]) -> Any:
+        return (await self.all(call))[0]
+
+    async def think(self) -> None:
+        if self.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000.0 / self.think_ms))
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    # --- API calls as frontend-vue/src/api/arrbo.ts makes them ---
+
+    async def available_dates(self) -> list[str]:
+        return await self.one(self.get("/api/games/available-dates", "games_available_dates")) or []
+
+    async def games(self, date: str) -> list[dict[str, Any]]:
+        data = await self.get("/api/games", "games_by_date", {"date": date})
+        if data:
+            return data
+        # getGames(): fall back to the latest date with games
+        latest = await self.get("/api/games/latest-date", "games_latest_date")
+        if not latest or latest == date:
+            return data or []
+        return await self.get("/api/games", "games_by_date", {"date": str(latest)}) or []
+
+    async def game(self, game_id: str) -> Any:
+        return await self.get(f"/api/games/{game_id}", "game_by_id")
+
+    async def player_data(self) -> None:
+        # players store ensureDataLoaded()
+        await self.all(
+            self.get("/api/usage/top", "usage_top"),
+            self.get("/api/averages", "averages"),
+            self.get("/api/positions", "positions"),
+            self.get("/api/defense/efficiency", "defense_efficiency"),
+        )
+
+    def pick_day_pair(self, dates: list[str]) -> tuple[str, str]:
+        # Any stored day, not just today: spreads reads over the table like real browsing over time
+        if not dates:
+            today = time.strftime("%Y-%m-%d")
+            return today, today
+        i = self.rng.randrange(len(dates))
+        return dates[i], dates[min(i + 1, len(dates) - 1)]
+
+
+# --- Scenarios: one per Vue view's load sequence ---
+
+async def dashboard(u: VirtualUser) -> None:
+    day, next_day = u.pick_day_pair(await u.available_dates())
+    games, _ = await u.all(u.games(day), u.games(next_day))
+    await u.think()
+    if games:
+        await u.one(u.player_data())  # selectGame -> ensureDataLoaded
+    await u.think()
+    await u.one(u.games(next_day))  # toggle to "tomorrow"
+
+
+async def league_leaders(u: VirtualUser) -> None:
+    day, next_day = u.pick_day_pair(await u.available_dates())
+    await u.all(u.player_data(), u.games(day), u.games(next_day))
+
+
+async def game_detail(u: VirtualUser) -> None:
+    day, _ = u.pick_day_pair(await u.available_dates())
+    games = await u.one(u.games(day))
+    # open a few games from the day's list, reading between them
+    for g in u.rng.sample(games, k=min(len(games), u.rng.randint(1, 3))):
+        await u.think()
+        await u.all(u.game(str(g["gameId"])), u.player_data())
+
+
+async def team_comparison(u: VirtualUser) -> None:
+    await u.one(u.player_data())
+
+
+SCENARIOS: dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "dashboard": dashboard,
+    "league_leaders": league_leaders,
+    "game_detail": game_detail,
+    "team_comparison": team_comparison,
+}
+
+DEFAULT_MIX = {"dashboard": 4.0, "game_detail": 3.0, "league_leaders": 2.0, "team_comparison": 1.0}
+
+
+def parse_mix(spec: str | None) -> dict[str, float]:
+    """'dashboard=4,game_detail=3' -> weights; unset = DEFAULT_MIX."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; known: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+@dataclass
+class MixSpec:
+    base_url: str
+    mix: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    users: int = 10
+    iterations: int | None = 50      # scenarios in total, or
+    duration_s: float | None = None  # run for this long
+    think_ms: float = 200.0          # mean of an exponential think time
+    timeout_s: float = 5.0
+    seed: int | None = None
+
+
+async def run_mix_async(spec: MixSpec) -> MixReport:
+    report = MixReport()
+    names = list(spec.mix)
+    weights = [spec.mix[n] for n in names]
+    remaining = [spec.iterations] if spec.iterations else None
+    seed_rng = random.Random(spec.seed)
+    t0 = time.perf_counter()
+    deadline = t0 + spec.duration_s if spec.duration_s else None
+
+    async def user_loop(u: VirtualUser) -> None:
+        try:
+            while True:
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                name = u.rng.choices(names, weights)[0]
+                stats = report.scenario(name)
+                u.api_s = 0.0
+                try:
+                    await SCENARIOS[name](u)
+                except (HttpError, KeyError, TypeError):
+                    stats.errors += 1
+                stats.requests += 1
+                stats.latency.record(u.api_s * 1000.0)
+                await u.think()
+        finally:
+            await u.close()
+
+    users = [
+        VirtualUser(spec.base_url, report, random.Random(seed_rng.random()), spec.think_ms, spec.timeout_s)
+        for _ in range(max(1, spec.users))
+    ]
+    await asyncio.gather(*(user_loop(u) for u in users))
+    report.elapsed_s = time.perf_counter() - t0
+    return report
+
+
+def run_mix(spec: MixSpec) -> MixReport:
+    return asyncio.run(run_mix_async(spec))
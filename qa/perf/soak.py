@@ -0,0 +1,318 @@
+import asyncio
+import dataclasses
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import psycopg
+
+from qa.perf import loadgen
+from qa.perf.histogram import Histogram
+from qa.perf.loadgen import LoadSpec, Sample
+
+# Server-side connection picture, excluding the sampler's own session
+PG_ACTIVITY_SQL = """
+SELECT count(*) AS connections,
+       count(*) FILTER (WHERE state = 'active') AS active,
+       count(*) FILTER (WHERE state = 'idle') AS idle,
+       count(*) FILTER (WHERE state LIKE 'idle in transaction%') AS idle_in_transaction,
+       coalesce(max(extract(epoch FROM now() - xact_start))
+                FILTER (WHERE state LIKE 'idle in transaction%'), 0)::float AS oldest_idle_in_transaction_s,
+       current_setting('max_connections')::int AS max_connections
+FROM pg_stat_activity
+WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+_SIZE_UNITS = {
+    "b": 1, "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+    "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+}
+
+
+@dataclass
+class SoakSpec:
+    """
+    `base` (open mode, fixed rate) for `duration_s`, after its warmup. Latency is kept
+    per `window_s` window; containers and Postgres are sampled every `sample_s`.
+    Single process: soak rates are far below what one generator can drive.
+    """
+
+    base: LoadSpec
+    duration_s: float = 1800.0
+    window_s: float = 60.0
+    sample_s: float = 15.0
+    containers: tuple[str, ...] = ("arrbo-api", "arrbo-postgres")
+    # psycopg.connect() kwargs; None = no Postgres sampling
+    db: dict[str, Any] | None = None
+    # drift limits over the whole run, measured on the fitted trend line
+    max_p99_drift: float = 0.25     # relative
+    max_memory_drift: float = 0.20  # relative, per container
+    max_connection_growth: float = 5.0  # absolute
+    # a trend this far from a line is noise (e.g. p99 of short windows), not drift
+    min_r2: float = 0.5
+
+    def __post_init__(self) -> None:
+        if self.base.mode != "open":
+            raise ValueError("soak runs at a fixed arrival rate: base spec must be open mode")
+
+    @classmethod
+    def from_env(cls, url: str, *, concurrency: int, timeout_s: float, db: dict[str, Any] | None) -> "SoakSpec":
+        duration_s = float(os.getenv("PERF_SOAK_DURATION_S", str(cls.duration_s)))
+        containers = os.getenv("PERF_SOAK_CONTAINERS", ",".join(cls.containers))
+        return cls(
+            base=LoadSpec(
+                url=url,
+                mode="open",
+                rate=float(os.getenv("PERF_SOAK_RATE", "20")),
+                total=None,
+                duration_s=duration_s,
+                concurrency=concurrency,
+                # long enough for the JIT and connection pools to settle before the trend starts
+                warmup_s=float(os.getenv("PERF_SOAK_WARMUP_S", "60")),
+                timeout_s=timeout_s,
+            ),
+            duration_s=duration_s,
+            window_s=float(os.getenv("PERF_SOAK_WINDOW_S", str(cls.window_s))),
+            sample_s=float(os.getenv("PERF_SOAK_SAMPLE_S", str(cls.sample_s))),
+            containers=tuple(c.strip() for c in containers.split(",") if c.strip()),
+            db=db,
+            max_p99_drift=float(os.getenv("PERF_SOAK_MAX_P99_DRIFT", str(cls.max_p99_drift))),
+            max_memory_drift=float(os.getenv("PERF_SOAK_MAX_MEMORY_DRIFT", str(cls.max_memory_drift))),
+            max_connection_growth=float(os.getenv("PERF_SOAK_MAX_CONNECTION_GROWTH", str(cls.max_connection_growth))),
+            min_r2=float(os.getenv("PERF_SOAK_MIN_R2", str(cls.min_r2))),
+        )
+
+
+@dataclass
+class Window:
+    start_s: float
+    latency: Histogram = field(default_factory=Histogram)
+    total: int = 0
+    errors: int = 0
+
+    def add(self, s: Sample) -> None:
+        self.total += 1
+        self.latency.record(s.response_ms)
+        if s.failed:
+            self.errors += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "start_s": self.start_s,
+            "total": self.total,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.total) if self.total else 0.0,
+            **self.latency.summary(),
+        }
+
+
+@dataclass
+class Trend:
+    """Least-squares line through (t, value); start/end are the fitted values at the first/last point."""
+
+    points: int
+    slope_per_h: float
+    start: float
+    end: float
+    r2: float
+
+    @property
+    def change(self) -> float:
+        return self.end - self.start
+
+    @property
+    def relative_change(self) -> float:
+        return self.change / abs(self.start) if self.start else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "change": self.change, "relative_change": self.relative_change}
+
+
+def fit_trend(series: list[tuple[float, float]]) -> Trend | None:
+    """None with fewer than 3 points: two points always make a perfect, meaningless line."""
+    if len(series) < 3:
+        return None
+    n = len(series)
+    mean_t = sum(t for t, _ in series) / n
+    mean_v = sum(v for _, v in series) / n
+    stt = sum((t - mean_t) ** 2 for t, _ in series)
+    if not stt:
+        return None
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in series) / stt
+    intercept = mean_v - slope * mean_t
+    svv = sum((v - mean_v) ** 2 for _, v in series)
+    sse = sum((v - (intercept + slope * t)) ** 2 for t, v in series)
+    r2 = 1.0 - sse / svv if svv else 1.0
+    t_first, t_last = series[0][0], series[-1][0]
+    return Trend(n, slope * 3600.0, intercept + slope * t_first, intercept + slope * t_last, r2)
+
+
+def parse_size(text: str) -> float:
+    """docker stats sizes: '512.3MiB', '1.2GiB', '0B'."""
+    m = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]+)\s*", text)
+    if not m or m.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"Unrecognised size {text!r}")
+    return float(m.group(1)) * _SIZE_UNITS[m.group(2).lower()]
+
+
+async def docker_stats(containers: tuple[str, ...]) -> dict[str, dict[str, float]]:
+    proc = await asyncio.create_subprocess_exec(
+        "docker", "stats", "--no-stream", "--format", "{{json .}}", *containers,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"docker stats failed: {err.decode(errors='replace').strip()}")
+    stats = {}
+    for line in out.decode().splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        stats[row["Name"]] = {
+            "memory_bytes": parse_size(row["MemUsage"].split("/")[0]),
+            "cpu_pct": float(row["CPUPerc"].rstrip("%") or 0),
+        }
+    return stats
+
+
+def pg_activity(conn: psycopg.Connection) -> dict[str, float]:
+    with conn.cursor() as cur:
+        cur.execute(PG_ACTIVITY_SQL)
+        row = cur.fetchone()
+        names = [d.name for d in cur.description]
+    return dict(zip(names, row))
+
+
+@dataclass
+class SoakReport:
+    spec: SoakSpec
+    windows: list[Window] = field(default_factory=list)
+    resources: list[dict[str, Any]] = field(default_factory=list)
+    # samplers that could not run (no docker CLI, no DB access); the soak itself still counts
+    sampler_errors: dict[str, str] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    def window(self, at_s: float) -> Window:
+        idx = max(0, int(at_s // self.spec.window_s))
+        while len(self.windows) <= idx:
+            self.windows.append(Window(len(self.windows) * self.spec.window_s))
+        return self.windows[idx]
+
+    def series(self) -> dict[str, list[tuple[float, float]]]:
+        """Every tracked metric as (seconds since start, value)."""
+        out: dict[str, list[tuple[float, float]]] = {}
+        # window midpoints; a trailing partial window would skew p99 and is dropped
+        full = [w for w in self.windows if w.total and w.start_s + self.spec.window_s <= self.elapsed_s + 1e-6]
+        out["p99_ms"] = [(w.start_s + self.spec.window_s / 2, w.latency.percentile(0.99)) for w in full]
+        for sample in self.resources:
+            for name, c in sample.get("containers", {}).items():
+                out.setdefault(f"{name}.memory_bytes", []).append((sample["t_s"], c["memory_bytes"]))
+            if "postgres" in sample:
+                for key in ("connections", "idle_in_transaction"):
+                    out.setdefault(f"postgres.{key}", []).append((sample["t_s"], sample["postgres"][key]))
+        return out
+
+    def drift(self) -> dict[str, dict[str, Any]]:
+        spec = self.spec
+        findings = {}
+        for name, series in self.series().items():
+            trend = fit_trend(series)
+            if trend is None:
+                continue
+            if name == "p99_ms":
+                drifted = trend.relative_change > spec.max_p99_drift
+                limit = f"+{spec.max_p99_drift:.0%}"
+            elif name.endswith(".memory_bytes"):
+                drifted = trend.relative_change > spec.max_memory_drift
+                limit = f"+{spec.max_memory_drift:.0%}"
+            else:
+                drifted = trend.change > spec.max_connection_growth
+                limit = f"+{spec.max_connection_growth:g}"
+            drifted = drifted and trend.r2 >= spec.min_r2
+            findings[name] = {**trend.to_dict(), "limit": limit, "drifted": drifted}
+        return findings
+
+    def to_dict(self) -> dict[str, Any]:
+        overall = Histogram()
+        total = errors = 0
+        for w in self.windows:
+            overall.merge(w.latency)
+            total += w.total
+            errors += w.errors
+        drift = self.drift()
+        return {
+            "target_rps": self.spec.base.rate,
+            "duration_s": self.spec.duration_s,
+            "window_s": self.spec.window_s,
+            "elapsed_s": self.elapsed_s,
+            "total": total,
+            "errors": errors,
+            "error_rate": (errors / total) if total else 0.0,
+            "achieved_rps": (total / self.elapsed_s) if self.elapsed_s else 0.0,
+            **overall.summary(),
+            "histogram": overall.encode(),
+            "drifted": sorted(name for name, d in drift.items() if d["drifted"]),
+            "drift": drift,
+            "windows": [w.to_dict() for w in self.windows],
+            "resources": self.resources,
+            "sampler_errors": self.sampler_errors,
+        }
+
+
+async def _sample_resources(spec: SoakSpec, report: SoakReport, t0: float) -> None:
+    conn = None
+    if spec.db is not None:
+        try:
+            conn = await asyncio.to_thread(psycopg.connect, autocommit=True, **spec.db)
+        except psycopg.Error as e:
+            report.sampler_errors["postgres"] = repr(e)
+    use_docker = bool(spec.containers)
+    try:
+        while True:
+            sample: dict[str, Any] = {"t_s": time.perf_counter() - t0}
+            if use_docker:
+                try:
+                    sample["containers"] = await docker_stats(spec.containers)
+                except (OSError, RuntimeError, ValueError) as e:
+                    # no docker CLI / daemon here: stop asking, keep the rest of the soak
+                    report.sampler_errors["docker"] = repr(e)
+                    use_docker = False
+            if conn is not None:
+                try:
+                    sample["postgres"] = await asyncio.to_thread(pg_activity, conn)
+                except psycopg.Error as e:
+                    report.sampler_errors["postgres"] = repr(e)
+            report.resources.append(sample)
+            await asyncio.sleep(max(0.0, spec.sample_s - (time.perf_counter() - t0 - sample["t_s"])))
+    finally:
+        if conn is not None:
+            await asyncio.to_thread(conn.close)
+
+
+async def run_soak_async(spec: SoakSpec) -> SoakReport:
+    report = SoakReport(spec)
+    sampler: asyncio.Task | None = None
+    t0 = time.perf_counter()
+
+    def start(at: float) -> None:
+        nonlocal sampler, t0
+        t0 = at
+        sampler = asyncio.create_task(_sample_resources(spec, report, t0))
+
+    base = dataclasses.replace(spec.base, total=None, duration_s=spec.duration_s)
+    try:
+        await loadgen.open_loop(base, lambda s: report.window(s.intended - t0).add(s), on_start=start)
+    finally:
+        report.elapsed_s = time.perf_counter() - t0
+        if sampler is not None:
+            sampler.cancel()
+            await asyncio.gather(sampler, return_exceptions=True)
+    return report
+
+
+def run_soak(spec: SoakSpec) -> SoakReport:
+    return asyncio.run(run_soak_async(spec))
@@ -0,0 +1,146 @@
+import csv
+import dataclasses
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+from qa.perf.distributed import run_distributed
+from qa.perf.loadgen import LoadSpec
+
+CURVE_FIELDS = [
+    "step", "concurrency", "target_rps", "achieved_rps", "total", "error_rate",
+    "p50_ms", "p95_ms", "p99_ms", "passed",
+]
+
+
+@dataclass
+class SweepSpec:
+    """
+    Step the load on `base` up until a step breaches the error-rate or p99 limit:
+    closed mode steps concurrency, open mode steps the arrival rate. Each step runs
+    for `step_s` (after its own warmup) and levels grow by `factor`.
+    """
+
+    base: LoadSpec
+    start: float = 1.0
+    factor: float = 2.0
+    max_level: float = 256.0
+    step_s: float = 10.0
+    max_error_rate: float = 0.01
+    max_p99_ms: float = 1000.0
+    # the knee is the last step whose throughput grew by at least this much over the previous one
+    min_gain: float = 0.10
+
+    def __post_init__(self) -> None:
+        if self.factor <= 1.0:
+            raise ValueError("sweep factor must be > 1")
+
+    @classmethod
+    def from_env(cls, base: LoadSpec) -> "SweepSpec":
+        # open mode levels are req/s, so it starts and tops out higher than concurrency does
+        start, max_level = (cls.start, cls.max_level) if base.mode == "closed" else (10.0, 5000.0)
+        return cls(
+            base=base,
+            start=float(os.getenv("PERF_SWEEP_START", str(start))),
+            factor=float(os.getenv("PERF_SWEEP_FACTOR", str(cls.factor))),
+            max_level=float(os.getenv("PERF_SWEEP_MAX", str(max_level))),
+            step_s=float(os.getenv("PERF_SWEEP_STEP_S", str(cls.step_s))),
+            max_error_rate=float(os.getenv("PERF_SWEEP_MAX_ERROR_RATE", str(cls.max_error_rate))),
+            max_p99_ms=float(os.getenv("PERF_SWEEP_MAX_P99_MS", str(cls.max_p99_ms))),
+            min_gain=float(os.getenv("PERF_SWEEP_MIN_GAIN", str(cls.min_gain))),
+        )
+
+    def levels(self) -> list[float]:
+        out = []
+        level = self.start
+        while level <= self.max_level:
+            out.append(level)
+            nxt = level * self.factor
+            # integer concurrency must still move when start * factor rounds down
+            level = max(nxt, level + 1) if self.base.mode == "closed" else nxt
+        return out
+
+    def step_spec(self, level: float) -> LoadSpec:
+        if self.base.mode == "closed":
+            return dataclasses.replace(self.base, concurrency=int(level), total=None, duration_s=self.step_s)
+        return dataclasses.replace(self.base, rate=level, total=None, duration_s=self.step_s)
+
+
+@dataclass
+class SweepResult:
+    mode: str
+    min_gain: float = 0.10
+    points: list[dict[str, Any]] = field(default_factory=list)
+    stop_reason: str | None = None
+
+    @property
+    def knee(self) -> dict[str, Any] | None:
+        """Where more load stops buying throughput: past it, extra load only queues and adds latency."""
+        passed = [p for p in self.points if p["passed"]]
+        if not passed:
+            return None
+        knee = passed[0]
+        for prev, cur in zip(passed, passed[1:]):
+            if prev["achieved_rps"] and (cur["achieved_rps"] - prev["achieved_rps"]) / prev["achieved_rps"] < self.min_gain:
+                break
+            knee = cur
+        return knee
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "stop_reason": self.stop_reason,
+            "knee": self.knee,
+            "points": self.points,
+        }
+
+
+def _point(step: int, spec: LoadSpec, report: dict[str, Any], sweep: SweepSpec) -> dict[str, Any]:
+    breaches = []
+    if report["error_rate"] > sweep.max_error_rate:
+        breaches.append(f"error rate {report['error_rate']:.2%} > {sweep.max_error_rate:.2%}")
+    if report["p99_ms"] > sweep.max_p99_ms:
+        breaches.append(f"p99 {report['p99_ms']:.1f}ms > {sweep.max_p99_ms:.0f}ms")
+    return {
+        "step": step,
+        "concurrency": spec.concurrency,
+        "target_rps": spec.rate if spec.mode == "open" else None,
+        "achieved_rps": report["achieved_rps"],
+        "total": report["total"],
+        "error_rate": report["error_rate"],
+        "p50_ms": report["p50_ms"],
+        "p95_ms": report["p95_ms"],
+        "p99_ms": report["p99_ms"],
+        "passed": not breaches,
+        "breaches": breaches,
+        "client": report["client"],
+    }
+
+
+def run_sweep(sweep: SweepSpec, workers: int | None = None) -> SweepResult:
+    result = SweepResult(mode=sweep.base.mode, min_gain=sweep.min_gain)
+    for step, level in enumerate(sweep.levels()):
+        spec = sweep.step_spec(level)
+        point = _point(step, spec, run_distributed(spec, workers=workers).to_dict(), sweep)
+        result.points.append(point)
+        if not point["passed"]:
+            result.stop_reason = "; ".join(point["breaches"])
+            break
+    else:
+        result.stop_reason = f"reached max level {sweep.max_level:g} without breaching limits"
+    return result
+
+
+def write_curve(result: SweepResult, out_dir: str, name: str) -> tuple[str, str]:
+    """<name>.json (full result) and <name>.csv (one row per step) under `out_dir`."""
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, f"{name}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(result.to_dict(), f, indent=2)
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CURVE_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(result.points)
+    return json_path, csv_path
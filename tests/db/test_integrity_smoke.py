@@ -38,6 +38,11 @@ def test_top_usage_players_usage_ranges(db_cursor): # Usage % between 0 and 100
            OR (player3_usage IS NOT NULL AND (player3_usage < 0 OR player3_usage > 100))
            OR (player4_usage IS NOT NULL AND (player4_usage < 0 OR player4_usage > 100))
            OR (player5_usage IS NOT NULL AND (player5_usage < 0 OR player5_usage > 100))
+           OR (player6_usage IS NOT NULL AND (player6_usage < 0 OR player6_usage > 100))
+           OR (player7_usage IS NOT NULL AND (player7_usage < 0 OR player7_usage > 100))
+           OR (player8_usage IS NOT NULL AND (player8_usage < 0 OR player8_usage > 100))
+           OR (player9_usage IS NOT NULL AND (player9_usage < 0 OR player9_usage > 100))
+           OR (player10_usage IS NOT NULL AND (player10_usage < 0 OR player10_usage > 100))
     """)
     (bad,) = db_cursor.fetchone()
     assert bad == 0
@@ -51,6 +56,11 @@ def test_top_usage_players_name_usage_pairing(db_cursor): #If usage exists, the
            OR (player3_name IS NULL AND player3_usage IS NOT NULL)
            OR (player4_name IS NULL AND player4_usage IS NOT NULL)
            OR (player5_name IS NULL AND player5_usage IS NOT NULL)
+           OR (player6_name IS NULL AND player6_usage IS NOT NULL)
+           OR (player7_name IS NULL AND player7_usage IS NOT NULL)
+           OR (player8_name IS NULL AND player8_usage IS NOT NULL)
+           OR (player9_name IS NULL AND player9_usage IS NOT NULL)
+           OR (player10_name IS NULL AND player10_usage IS NOT NULL)
     """)
     (bad,) = db_cursor.fetchone()
     assert bad == 0
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from qa.perf.baseline import check_and_record
+from qa.perf.scenarios import MixSpec, parse_mix, run_mix
+from qa.perf.config import perf_config, write_artifact
+
+pytestmark = pytest.mark.perf
+
+# per-endpoint p95 budget under the mix; same limits as the isolated smoke tests
+P95_LIMIT_MS = 500
+
+
+def test_perf_mixed_workload():
+    cfg = perf_config()
+    iterations = os.getenv("PERF_MIX_ITERATIONS")
+    spec = MixSpec(
+        base_url=cfg["base_url"],
+        # PERF_MIX="dashboard=4,game_detail=3,league_leaders=2,team_comparison=1"
+        mix=parse_mix(os.getenv("PERF_MIX")),
+        users=cfg["concurrency"],
+        iterations=None if cfg["duration_s"] else int(iterations or "50"),
+        duration_s=cfg["duration_s"],
+        think_ms=float(os.getenv("PERF_THINK_MS", "200")),
+        timeout_s=cfg["timeout_s"],
+        seed=int(os.environ["PERF_MIX_SEED"]) if os.getenv("PERF_MIX_SEED") else None,
+    )
+
+    report = run_mix(spec).to_dict()
+    write_artifact("mixed_workload", {"mix": spec.mix, "users": spec.users, **report})
+
+    assert report["total"], "Mixed workload sent no requests"
+    assert report["error_rate"] < 0.01, f"Error rate too high: {report['error_rate']:.2%}"
+    slow = {
+        name: round(e["p95_ms"], 1)
+        for name, e in report["endpoints"].items()
+        if e["p95_ms"] >= P95_LIMIT_MS
+    }
+    assert not slow, f"p95 over {P95_LIMIT_MS}ms under the mixed workload: {slow}"
+
+    regressed = [
+        name
+        for name, e in report["endpoints"].items()
+        # latency under the mix depends on how many users drive it
+        if check_and_record(f"mixed.{name}.u{spec.users}", e)["regressed"]
+    ]
+    assert not regressed, f"Endpoints regressed vs baseline under the mixed workload: {regressed}"
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from qa.perf.soak import SoakSpec, run_soak
+from qa.perf.config import perf_config, write_artifact
+
+pytestmark = [
+    pytest.mark.perf,
+    # 30-60 minutes: run on demand (nightly / before a release), not on every CI run
+    pytest.mark.skipif(os.getenv("PERF_SOAK") != "1", reason="set PERF_SOAK=1 to run the soak test"),
+]
+
+
+def soak_spec(cfg) -> SoakSpec:
+    path = os.getenv("PERF_SOAK_PATH", "/api/averages")
+    return SoakSpec.from_env(
+        f"{cfg['base_url']}{path}",
+        concurrency=cfg["concurrency"],
+        timeout_s=cfg["timeout_s"],
+        db={
+            "host": os.getenv("ARRBO_DB_HOST", "localhost"),
+            "port": os.getenv("ARRBO_DB_PORT", "5432"),
+            "dbname": os.getenv("ARRBO_DB_NAME", "arrbo"),
+            "user": os.getenv("ARRBO_DB_USER", "arrbo"),
+            "password": os.getenv("ARRBO_DB_PASSWORD", ""),
+        },
+    )
+
+
+def test_perf_soak():
+    spec = soak_spec(perf_config())
+
+    report = run_soak(spec).to_dict()
+    write_artifact("soak", {"url": spec.base.url, **report})
+
+    assert report["total"], "Soak sent no requests"
+    assert report["error_rate"] < 0.01, f"Error rate too high over the soak: {report['error_rate']:.2%}"
+    drifted = {
+        name: f"{d['change']:+.4g} ({d['relative_change']:+.1%}, limit {d['limit']})"
+        for name, d in report["drift"].items()
+        if d["drifted"]
+    }
+    assert not drifted, f"Drift over {report['elapsed_s'] / 60:.1f} min: {drifted}"
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from qa.perf.loadgen import LoadSpec
+from qa.perf.sweep import SweepSpec, run_sweep, write_curve
+from qa.perf.config import ARTIFACT_DIR, perf_config
+
+pytestmark = [
+    pytest.mark.perf,
+    # minutes long: run on demand for capacity planning, not on every CI run
+    pytest.mark.skipif(os.getenv("PERF_SWEEP") != "1", reason="set PERF_SWEEP=1 to run the saturation sweep"),
+]
+
+
+def test_perf_sweep():
+    cfg = perf_config()
+    path = os.getenv("PERF_SWEEP_PATH", "/api/averages")
+    mode = cfg["mode"]
+    # levels are concurrency (closed) or req/s (open)
+    sweep = SweepSpec.from_env(LoadSpec(
+        url=f"{cfg['base_url']}{path}",
+        mode=mode,
+        concurrency=cfg["concurrency"],
+        rate=1.0 if mode == "open" else None,
+        warmup_s=cfg["warmup_s"],
+        timeout_s=cfg["timeout_s"],
+    ))
+
+    result = run_sweep(sweep, workers=cfg["workers"])
+    name = "sweep_" + path.strip("/").replace("/", "_") + f".{mode}"
+    write_curve(result, ARTIFACT_DIR, name)
+
+    assert result.knee is not None, f"{path} breached the limits at the first sweep step: {result.stop_reason}"
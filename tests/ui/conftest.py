@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
+from arrbo_ingest.browser_pool import BrowserPool
+
 
 # Separate env file from other tests
 load_dotenv(".env.test")
@@ -25,8 +27,7 @@ def headless() -> bool:
     return v in ("1", "true", "yes", "y")
 
 
-@pytest.fixture
-def driver(headless: bool):
+def _build_chrome(headless: bool) -> webdriver.Chrome:
     opts = ChromeOptions()
     if headless:
         opts.add_argument("--headless=new")
@@ -36,11 +37,27 @@ def driver(headless: bool):
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
 
-    d = webdriver.Chrome(options=opts)
+    return webdriver.Chrome(options=opts)
 
-    d.implicitly_wait(0)
-    yield d
-    d.quit()
+
+@pytest.fixture(scope="session")
+def browser_pool(headless: bool):
+    # One pool per pytest process (so per xdist worker); browsers are reused across tests
+    pool = BrowserPool(
+        lambda: _build_chrome(headless),
+        size=int(os.getenv("UI_BROWSER_POOL_SIZE", "1")),
+        max_uses=int(os.getenv("UI_BROWSER_MAX_USES", "25")),
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def driver(browser_pool: BrowserPool):
+    # Checked out on a fresh tab with cookies/storage cleared, scrubbed again on return
+    with browser_pool.checkout() as d:
+        d.implicitly_wait(0)
+        yield d
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -0,0 +1,101 @@
+import json
+import random
+
+import pytest
+
+from qa.perf.baseline import GateConfig, check_and_record, compare, load_shape_key, load_store, mann_whitney_greater
+from qa.perf.histogram import Histogram
+
+pytestmark = pytest.mark.unit
+
+
+def histogram(n: int, seed: int, scale: float = 1.0) -> Histogram:
+    rng = random.Random(seed)
+    h = Histogram()
+    for _ in range(n):
+        h.record(rng.lognormvariate(2.0, 0.3) * scale)
+    return h
+
+
+def report(seed: int, scale: float = 1.0) -> dict:
+    return {"histogram": histogram(500, seed, scale).encode()}
+
+
+def test_shifted_samples_are_significantly_greater():
+    mw = mann_whitney_greater(histogram(500, seed=1, scale=1.2), histogram(500, seed=2))
+
+    assert mw.p_value < 0.001
+    assert mw.effect > 0.6
+
+
+def test_same_distribution_is_not_significant():
+    mw = mann_whitney_greater(histogram(500, seed=1), histogram(500, seed=2))
+
+    assert mw.p_value > 0.05
+    assert mw.effect == pytest.approx(0.5, abs=0.05)
+
+
+def test_faster_samples_are_not_greater():
+    assert mann_whitney_greater(histogram(500, seed=1, scale=0.8), histogram(500, seed=2)).p_value > 0.99
+
+
+def test_identical_histograms_tie():
+    h = histogram(200, seed=3)
+
+    mw = mann_whitney_greater(h, h)
+
+    assert mw.effect == pytest.approx(0.5)
+    assert mw.p_value > 0.4
+
+
+def test_empty_side_is_never_significant():
+    assert mann_whitney_greater(Histogram(), histogram(10, seed=1)).p_value == 1.0
+
+
+def test_compare_collects_until_min_runs():
+    diff = compare("ep", report(1, scale=3.0), [report(2)], GateConfig(min_runs=3))
+
+    assert diff["status"] == "collecting"
+    assert not diff["regressed"]
+
+
+def test_compare_flags_a_slower_run():
+    runs = [report(seed) for seed in range(10, 13)]
+
+    diff = compare("ep", report(1, scale=1.3), runs, GateConfig(min_runs=3))
+
+    assert diff["status"] == "regressed"
+    assert diff["regressed"]
+    assert diff["change"]["p50_ms"] > 0.2
+
+
+def test_compare_ignores_a_significant_but_small_change():
+    runs = [report(seed) for seed in range(10, 13)]
+
+    diff = compare("ep", report(1, scale=1.05), runs, GateConfig(min_runs=3, min_change=0.5))
+
+    assert diff["status"] == "ok"
+
+
+def test_check_and_record_keeps_ok_runs_and_skips_regressions(tmp_path):
+    cfg = GateConfig(path=str(tmp_path / "baseline.json"), keep=4, min_runs=3)
+
+    for seed in range(6):
+        assert not check_and_record("ep", report(seed), cfg)["regressed"]
+    assert len(load_store(cfg.path)["endpoints"]["ep"]) == 4
+
+    diff = check_and_record("ep", report(99, scale=1.5), cfg)
+
+    assert diff["regressed"]
+    assert len(load_store(cfg.path)["endpoints"]["ep"]) == 4
+    written = json.loads((tmp_path / "ep.diff.json").read_text(encoding="utf-8"))
+    assert written["status"] == "regressed"
+
+
+def test_load_shape_key():
+    closed = {"mode": "closed", "concurrency": 16, "target_rps": None, "client": {"processes": 4}}
+    opened = {"mode": "open", "concurrency": 16, "target_rps": 250.0, "client": {"processes": 2}}
+
+    assert load_shape_key("games", closed) == "games.closed.c16.w4"
+    assert load_shape_key("games", opened) == "games.open.r250.w2"
+    assert load_shape_key("games", {**opened, "target_rps": 12.5}) == "games.open.r12.5.w2"
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+# the scraper's deps come from ingestion-python/requirements.txt, not requirements-test.txt
+pytest.importorskip("bs4")
+pytest.importorskip("nba_api")
+
+from arrbo_ingest.jobs.defensive_efficiency import EFFICIENCY_COLUMNS, ParseError, _pivot, parse_page
+
+pytestmark = pytest.mark.unit
+
+FIXTURE = Path(__file__).parent / "fixtures" / "defense_vs_position.html"
+
+
+@pytest.fixture
+def page() -> str:
+    return FIXTURE.read_text(encoding="utf-8")
+
+
+def test_parse_page_reads_every_position_table(page):
+    rows = {row[0]: dict(zip(EFFICIENCY_COLUMNS, row[1:])) for row in _pivot(parse_page(page))}
+
+    # ATL=1, BOS=2, LAL=14; PG/SG share pg+sg columns and SF/PF share sf+pf (later tab wins)
+    assert set(rows) == {1, 2, 14}
+    assert rows[1] == {"pg_efficiency": 0.4, "sg_efficiency": 0.4, "sf_efficiency": 0.7, "pf_efficiency": 0.7, "c_efficiency": -1.4}
+    assert rows[14]["c_efficiency"] == 0.9
+    assert rows[2]["sf_efficiency"] == -0.3
+
+
+def test_parse_page_rejects_table_matching_two_positions(page):
+    # a layout class token "c" on the PG panel must not silently win or lose
+    page = page.replace('class="tab-pane" id="dvp-pg"', 'class="tab-pane c" id="dvp-pg"')
+    with pytest.raises(ParseError, match="several positions"):
+        parse_page(page)
+
+
+def test_parse_page_rejects_two_tables_for_one_position(page):
+    page = page.replace('id="dvp-sg"', 'id="dvp-pg"')
+    with pytest.raises(ParseError, match="More than one table resolves to position PG"):
+        parse_page(page)
+
+
+def test_parse_page_rejects_tables_labelled_only_by_shared_heading(page):
+    # without per-table ids every table's nearest preceding label is the last tab button
+    page = page.replace('class="tab-pane" id="dvp-', 'class="tab-pane" data-x="')
+    for pos in ("pg", "sg", "sf", "pf", "c"):
+        page = page.replace(f'data-x="{pos}"', "")
+    with pytest.raises(ParseError, match="More than one table resolves to position C"):
+        parse_page(page)
+
+
+def test_parse_page_reports_missing_positions(page):
+    start = page.index('<div class="tab-pane" id="dvp-c"')
+    page = page[:start] + page[page.index("</div>", page.index("</table>", start)) + len("</div>"):]
+    with pytest.raises(ParseError, match="No table found for positions C"):
+        parse_page(page)
@@ -0,0 +1,117 @@
+import json
+import random
+import statistics
+
+import pytest
+
+from qa.perf.histogram import Histogram, load_artifact, merge_artifacts
+
+pytestmark = pytest.mark.unit
+
+PERCENTILES = [0.0, 0.5, 0.9, 0.99, 0.999, 1.0]
+
+
+def latencies(n: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    # mostly fast, with a long tail: spans both the linear and the log buckets
+    return [rng.lognormvariate(2.0, 1.0) for _ in range(n)]
+
+
+def histogram(values: list[float]) -> Histogram:
+    h = Histogram()
+    for v in values:
+        h.record(v)
+    return h
+
+
+def exact_percentile(values: list[float], p: float) -> float:
+    """numpy's default (linear) percentile."""
+    ordered = sorted(values)
+    rank = p * (len(ordered) - 1)
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def test_encode_decode_round_trip():
+    h = histogram(latencies(5000, seed=1))
+
+    decoded = Histogram.decode(json.loads(json.dumps(h.encode())))
+
+    assert decoded.counts == h.counts
+    assert (decoded.count, decoded.min_us, decoded.max_us, decoded.sum_us) == (h.count, h.min_us, h.max_us, h.sum_us)
+    assert [decoded.percentile(p) for p in PERCENTILES] == [h.percentile(p) for p in PERCENTILES]
+
+
+def test_empty_histogram_round_trips():
+    decoded = Histogram.decode(Histogram().encode())
+
+    assert decoded.count == 0
+    assert decoded.percentile(0.99) == 0.0
+
+
+def test_decode_rejects_other_layouts():
+    data = Histogram().encode()
+    data["sub_bits"] += 1
+
+    with pytest.raises(ValueError):
+        Histogram.decode(data)
+
+
+def test_merge_equals_recording_everything_in_one():
+    a, b = latencies(2000, seed=2), latencies(3000, seed=3)
+
+    merged = histogram(a).merge(histogram(b))
+
+    assert merged.summary() == histogram(a + b).summary()
+
+
+def test_merged_artifacts_equal_one_histogram(tmp_path):
+    parts = [latencies(1000, seed=s) for s in range(3)]
+    paths = []
+    for i, part in enumerate(parts):
+        path = tmp_path / f"worker{i}.json"
+        path.write_text(json.dumps({"histogram": histogram(part).encode()}), encoding="utf-8")
+        paths.append(str(path))
+
+    assert merge_artifacts(paths).summary() == histogram(sum(parts, [])).summary()
+    assert load_artifact(paths[0]).count == 1000
+
+
+@pytest.mark.parametrize("p", PERCENTILES)
+def test_percentiles_are_within_bucket_error(p):
+    values = latencies(20000, seed=4)
+
+    estimate = histogram(values).percentile(p)
+    exact = exact_percentile(values, p)
+
+    # ~0.2% bucket width, plus 1us rounding at the low end
+    assert estimate == pytest.approx(exact, rel=0.005, abs=0.002)
+
+
+def test_min_max_mean_are_exact_to_the_microsecond():
+    values = [0.5, 1.25, 300.0, 12_345.678]
+    h = histogram(values)
+
+    assert h.min_ms == 0.5
+    assert h.max_ms == 12_345.678
+    assert h.mean_ms == pytest.approx(statistics.mean(values), abs=0.001)
+
+
+def test_record_corrected_back_fills_stalled_requests():
+    h = Histogram()
+
+    h.record_corrected(100.0, expected_interval_ms=30.0)
+
+    # the requests the stalled sender would have sent 30 and 60ms in waited 70 and 40ms
+    assert h.count == 3
+    assert [lo for lo, _, _ in h.distribution()] == pytest.approx([40.0, 70.0, 100.0], rel=0.002)
+
+
+def test_record_corrected_without_interval_records_once():
+    h = Histogram()
+
+    h.record_corrected(100.0, expected_interval_ms=None)
+    h.record_corrected(20.0, expected_interval_ms=30.0)
+
+    assert h.count == 2
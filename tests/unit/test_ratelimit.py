@@ -0,0 +1,49 @@
+import pytest
+
+from arrbo_ingest import ratelimit
+from arrbo_ingest.ratelimit import RateLimiter, TokenBucket, fetch_many
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(ratelimit, "time", clock)
+
+
+def test_token_bucket_allows_burst_then_paces_at_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.slept == pytest.approx([0.5, 0.5])
+
+
+def test_token_bucket_refills_while_idle_up_to_burst(clock):
+    bucket = TokenBucket(rate=1.0, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.now += 10.0  # far more than the burst's worth of refill
+
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_fetch_many_returns_results_and_errors_by_key():
+    def fn(key):
+        if key == 2:
+            raise RuntimeError("team 2 down")
+        return key * 10
+
+    results, errors = fetch_many(fn, [1, 2, 3], limiter=RateLimiter("test", rps=1000, max_in_flight=2))
+
+    assert results == {1: 10, 3: 30}
+    assert list(errors) == [2]
+    assert str(errors[2]) == "team 2 down"
@@ -0,0 +1,127 @@
+import json
+import socket
+
+import pytest
+import requests
+from requests import exceptions as rex
+
+from arrbo_ingest import resilience
+from arrbo_ingest.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    RetryBudgetExhausted,
+    call_with_retries,
+    is_retryable,
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, clock):
+    monkeypatch.setattr(resilience, "time", clock)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_metrics", {})
+    monkeypatch.setattr(resilience, "_budget", RetryBudget(10))
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        rex.ConnectionError(), rex.ReadTimeout(), rex.ConnectTimeout(), rex.ChunkedEncodingError(),
+        socket.timeout(), ConnectionResetError(), json.JSONDecodeError("Expecting value", "", 0),
+        http_error(429), http_error(503),
+    ],
+)
+def test_transient_errors_are_retryable(exc):
+    assert is_retryable(exc)
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        rex.MissingSchema(), rex.InvalidURL(), rex.InvalidHeader(), rex.TooManyRedirects(),
+        PermissionError(), OSError(), ValueError(), KeyError("x"), http_error(404), requests.HTTPError(),
+        CircuitOpenError(), RetryBudgetExhausted(),
+    ],
+)
+def test_permanent_errors_are_not_retryable(exc):
+    assert not is_retryable(exc)
+
+
+def test_breaker_opens_at_threshold_and_half_opens_after_reset(clock):
+    breaker = CircuitBreaker("h", failure_threshold=2, reset_timeout_s=30)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    breaker.before_call()  # the single trial call
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_breaker(clock):
+    breaker = CircuitBreaker("h", failure_threshold=1, reset_timeout_s=5)
+    breaker.record_failure()
+    clock.now += 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_call_with_retries_retries_transient_then_succeeds():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise rex.ReadTimeout()
+        return "ok"
+
+    assert call_with_retries(fn, host="a", attempts=4, base_sleep=0.01) == "ok"
+    assert len(calls) == 3
+    assert resilience.get_budget().spent == 2
+
+
+def test_call_with_retries_does_not_retry_or_trip_breaker_on_permanent_error():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise rex.MissingSchema("no scheme")
+
+    for _ in range(10):
+        with pytest.raises(rex.MissingSchema):
+            call_with_retries(fn, host="b", attempts=4)
+
+    assert len(calls) == 10
+    assert resilience.get_budget().spent == 0
+    assert resilience.get_breaker("b").state == "closed"
+
+
+def test_call_with_retries_stops_when_budget_is_spent(monkeypatch):
+    monkeypatch.setattr(resilience, "_budget", RetryBudget(1))
+
+    def fn():
+        raise rex.ConnectionError()
+
+    with pytest.raises(RetryBudgetExhausted):
+        call_with_retries(fn, host="c", attempts=5, base_sleep=0.01)
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from arrbo_ingest.scheduler import Job, run_dag
+
+pytestmark = pytest.mark.unit
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_run_dag_respects_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        def fn():
+            with lock:
+                order.append(name)
+        return fn
+
+    jobs = [
+        Job("report", step("report"), deps=("usage", "games")),
+        Job("usage", step("usage"), deps=("rosters",)),
+        Job("rosters", step("rosters")),
+        Job("games", step("games")),
+    ]
+    results = run_dag(jobs, max_parallel=2)
+
+    assert [r.name for r in results] == ["report", "usage", "rosters", "games"]
+    assert all(r.ok for r in results)
+    assert order.index("rosters") < order.index("usage") < order.index("report")
+    assert order.index("games") < order.index("report")
+
+
+def test_failed_job_skips_dependents_but_not_independent_jobs():
+    ran = []
+    jobs = [
+        Job("rosters", _fail),
+        Job("usage", lambda: ran.append("usage"), deps=("rosters",)),
+        Job("report", lambda: ran.append("report"), deps=("usage",)),
+        Job("games", lambda: ran.append("games")),
+    ]
+    results = {r.name: r for r in run_dag(jobs)}
+
+    assert results["rosters"].status == "failed"
+    assert isinstance(results["rosters"].error, RuntimeError)
+    assert results["usage"].status == "skipped"
+    assert results["report"].status == "skipped"
+    assert results["games"].ok
+    assert ran == ["games"]
+
+
+def test_max_parallel_bounds_jobs_in_flight():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    gate = threading.Barrier(2, timeout=5)
+
+    def job():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            gate.wait()  # only passes when two jobs really overlap
+        finally:
+            with lock:
+                in_flight -= 1
+
+    results = run_dag([Job(f"j{i}", job) for i in range(4)], max_parallel=2)
+
+    assert all(r.ok for r in results)
+    assert peak == 2
+
+
+@pytest.mark.parametrize(
+    "jobs, message",
+    [
+        ([Job("a", lambda: None, deps=("b",)), Job("b", lambda: None, deps=("a",))], "cycle"),
+        ([Job("a", lambda: None, deps=("missing",))], "unknown job missing"),
+        ([Job("a", lambda: None), Job("a", lambda: None)], "Duplicate job name"),
+    ],
+)
+def test_invalid_graphs_are_rejected_before_running(jobs, message):
+    with pytest.raises(ValueError, match=message):
+        run_dag(jobs)
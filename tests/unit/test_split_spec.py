@@ -0,0 +1,69 @@
+import pytest
+
+from qa.perf.distributed import split_spec
+from qa.perf.loadgen import LoadSpec
+
+pytestmark = pytest.mark.unit
+
+URL = "http://localhost/api"
+
+
+def test_closed_mode_divides_concurrency_and_total():
+    spec = LoadSpec(URL, mode="closed", total=1001, concurrency=10)
+
+    parts = split_spec(spec, 4)
+
+    assert [p.concurrency for p in parts] == [3, 3, 2, 2]
+    assert sum(p.total for p in parts) == 1001
+    assert max(p.total for p in parts) - min(p.total for p in parts) <= 1
+    assert all(p.mode == "closed" and p.url == URL for p in parts)
+
+
+def test_closed_mode_by_duration_keeps_duration():
+    spec = LoadSpec(URL, mode="closed", total=None, duration_s=30.0, concurrency=8)
+
+    parts = split_spec(spec, 3)
+
+    assert [p.concurrency for p in parts] == [3, 3, 2]
+    assert all(p.total is None and p.duration_s == 30.0 for p in parts)
+
+
+@pytest.mark.parametrize(
+    "spec, workers, expected",
+    [
+        (LoadSpec(URL, mode="closed", total=100, concurrency=3), 8, 3),
+        (LoadSpec(URL, mode="closed", total=2, concurrency=10), 8, 2),
+        (LoadSpec(URL, mode="open", rate=100.0, total=5), 8, 5),
+        (LoadSpec(URL, mode="open", rate=100.0, total=None, duration_s=10.0), 8, 8),
+        (LoadSpec(URL, mode="closed", total=100), 0, 1),
+    ],
+)
+def test_workers_are_capped_by_the_work(spec, workers, expected):
+    assert len(split_spec(spec, workers)) == expected
+
+
+def test_open_mode_divides_rate_and_interleaves_schedules():
+    spec = LoadSpec(URL, mode="open", rate=200.0, total=None, duration_s=10.0, concurrency=10, max_in_flight=101)
+
+    parts = split_spec(spec, 4)
+
+    assert sum(p.rate for p in parts) == pytest.approx(200.0)
+    assert [p.concurrency for p in parts] == [3, 3, 2, 2]
+    assert sum(p.max_in_flight for p in parts) == 101
+    # worker i sends at phase_i + k/rate_i: together, one arrival every 1/rate
+    arrivals = sorted(p.phase_s + k / p.rate for p in parts for k in range(50))
+    assert arrivals == pytest.approx([j / 200.0 for j in range(200)])
+
+
+def test_open_mode_keeps_at_least_one_connection_per_worker():
+    spec = LoadSpec(URL, mode="open", rate=50.0, total=None, duration_s=5.0, concurrency=2, max_in_flight=2)
+
+    parts = split_spec(spec, 4)
+
+    assert all(p.concurrency >= 1 and p.max_in_flight >= 1 for p in parts)
+
+
+def test_single_worker_is_the_spec_itself():
+    spec = LoadSpec(URL, mode="open", rate=50.0, total=None, duration_s=5.0, phase_s=0.25)
+
+    assert split_spec(spec, 1) == [spec]
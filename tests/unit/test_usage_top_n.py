@@ -0,0 +1,58 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("nba_api")
+
+from arrbo_ingest.jobs.usage import MAX_TOP_N, USAGE_COLUMNS, _roster_table, _slot_columns, _top_n  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+ATL, BOS = 1610612737, 1610612738
+
+
+def league(rows):
+    return pd.DataFrame(rows, columns=["TEAM_ID", "PLAYER_NAME", "USG_PCT"])
+
+
+def rosters(teams):
+    return {team_id: pd.DataFrame({"PLAYER": names}) for team_id, names in teams.items()}
+
+
+def test_ranks_current_players_by_usage_with_name_tiebreak():
+    players = league([
+        (ATL, "Young", 0.31), (ATL, "Murray", 0.24), (ATL, "Capela", 0.24),
+        (ATL, "Traded", 0.40),  # not on the current roster
+        (ATL, "Bench", 0.10),
+    ])
+    roster = _roster_table(rosters({ATL: ["Young", "Murray", "Capela", "Bench"]}))
+
+    top = _top_n(players, roster, 3)
+
+    assert list(top["team_id"]) == [1]
+    row = top.iloc[0]
+    assert [row["player1_name"], row["player2_name"], row["player3_name"]] == ["Young", "Capela", "Murray"]
+    assert [row["player1_usage"], row["player2_usage"], row["player3_usage"]] == [0.31, 0.24, 0.24]
+    for i in range(4, MAX_TOP_N + 1):
+        assert row[f"player{i}_name"] is None
+        assert row[f"player{i}_usage"] is None
+    assert list(top.columns) == USAGE_COLUMNS
+
+
+def test_teams_short_of_top_n_are_left_out():
+    players = league([(ATL, "A1", 0.3), (ATL, "A2", 0.2), (BOS, "B1", 0.3)])
+    roster = _roster_table(rosters({ATL: ["A1", "A2"], BOS: ["B1"]}))
+
+    top = _top_n(players, roster, 2)
+
+    assert list(top.index) == [ATL]
+
+
+def test_empty_rosters_give_no_rows():
+    players = league([(ATL, "A1", 0.3)])
+
+    assert _top_n(players, _roster_table({}), 1).empty
+
+
+def test_slot_columns():
+    assert _slot_columns(1) == ["team_id", "player1_name", "player1_usage"]
+    assert _slot_columns(MAX_TOP_N) == USAGE_COLUMNS